@@ -0,0 +1,99 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from tensorflow.keras.models import load_model
+
+load_dotenv()
+
+MODEL_DIR = "ai_model/models/tf_models"
+MODEL_CACHE_BUDGET_MB = int(os.getenv("MODEL_CACHE_BUDGET_MB", 1024))
+
+
+def model_paths(user_id: int, ticker: str) -> tuple[str, str, str]:
+    base_path = os.path.join(MODEL_DIR, f"{user_id}_{ticker}")
+    return base_path + ".keras", base_path + "_scaler.pkl", base_path + "_encoder.pkl"
+
+
+class ModelBundle:
+    def __init__(self, model, scaler, encoder, mtimes: tuple, size: int):
+        self.model = model
+        self.scaler = scaler
+        self.encoder = encoder
+        self.mtimes = mtimes
+        self.size = size
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of Keras models with their scaler and encoder, keyed by "{user_id}_{ticker}".
+
+    Entries are evicted least-recently-used once the estimated size exceeds the memory budget,
+    and reloaded when any of the three files changes on disk.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._bundles = OrderedDict()
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, ticker: str) -> ModelBundle:
+        key = f"{user_id}_{ticker}"
+        paths = model_paths(user_id, ticker)
+        if not all(os.path.exists(path) for path in paths):
+            self.invalidate(user_id, ticker)
+            raise FileNotFoundError("Required model/scaler/encoder files are missing.")
+        mtimes = tuple(os.path.getmtime(path) for path in paths)
+
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is not None and bundle.mtimes == mtimes:
+                self._bundles.move_to_end(key)
+                return bundle
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                bundle = self._bundles.get(key)
+                if bundle is not None and bundle.mtimes == mtimes:
+                    return bundle
+
+            bundle = self._load(paths, mtimes)
+
+            with self._lock:
+                self._bundles[key] = bundle
+                self._bundles.move_to_end(key)
+                self._evict(keep=key)
+            return bundle
+
+    def invalidate(self, user_id: int, ticker: str):
+        with self._lock:
+            self._bundles.pop(f"{user_id}_{ticker}", None)
+
+    def _load(self, paths: tuple, mtimes: tuple) -> ModelBundle:
+        model_path, scaler_path, encoder_path = paths
+        print(f"Loading model and scalers from {model_path}...")
+
+        model = load_model(model_path)
+        with open(scaler_path, "rb") as f:
+            scaler = pickle.load(f)
+        with open(encoder_path, "rb") as f:
+            encoder = pickle.load(f)
+
+        # float32 weights plus the pickled preprocessing objects
+        size = model.count_params() * 4 + os.path.getsize(scaler_path) + os.path.getsize(encoder_path)
+        return ModelBundle(model, scaler, encoder, mtimes, size)
+
+    def _evict(self, keep: str):
+        total = sum(bundle.size for bundle in self._bundles.values())
+        for key in list(self._bundles):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._bundles.pop(key).size
+
+
+model_registry = ModelRegistry(MODEL_CACHE_BUDGET_MB * 1024 * 1024)
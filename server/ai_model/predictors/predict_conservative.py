@@ -1,13 +1,21 @@
 import os
 import numpy as np
 import pandas as pd
-import pickle
 import matplotlib.pyplot as plt
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler, LabelEncoder
 from ai_model.preprocessing.indicator_engine import enrich_with_indicators
+from ai_model.predictors.model_registry import model_registry
+from ai_model.preprocessing.windowing import preceding_windows
+
+# Bars kept before the last window: enough for EMA_50 to converge (weight left on older bars < 1e-5)
+LIVE_WARMUP_BARS = 300
+
 
 def predict_signals(ticker: str, user_id: int, df: pd.DataFrame):
+    """
+    Live inference: the signal for the latest bar only.
+    Indicators are computed on a warm-up tail of the frame, and only the final window is scaled and run
+    through the model in a single forward pass.
+    """
     sequence_length = 30
     feature_columns = [
         'Open', 'High', 'Low', 'Close', 'Volume',
@@ -16,61 +24,32 @@ def predict_signals(ticker: str, user_id: int, df: pd.DataFrame):
         'MACD', 'MACD_Signal', 'BB_Band_Pct', 'ATR'
     ]
 
-    base_path = f"ai_model/models/tf_models/{user_id}_{ticker}"
-    model_path = base_path + ".keras"
-    scaler_path = base_path + "_scaler.pkl"
-    encoder_path = base_path + "_encoder.pkl"
-
-    print("Loading model and scalers...")
-    model = load_model(model_path)
-    with open(scaler_path, "rb") as f:
-        scaler: MinMaxScaler = pickle.load(f)
-    with open(encoder_path, "rb") as f:
-        encoder: LabelEncoder = pickle.load(f)
+    bundle = model_registry.get(user_id, ticker)
+    model, scaler, encoder = bundle.model, bundle.scaler, bundle.encoder
 
     if df is None or df.empty:
         return None
-    df = df.copy()
+    df = df.iloc[-(LIVE_WARMUP_BARS + sequence_length + 1):].copy()
     df = enrich_with_indicators(df)
     df.dropna(inplace=True)
-    original_closes = df["Close"].copy()
-    timestamps = df.index.copy()
-
-    df[feature_columns] = scaler.transform(df[feature_columns])
 
-    X, clean_timestamps, closes = [], [], []
-    for i in range(sequence_length, len(df)):
-        seq = df.iloc[i - sequence_length:i][feature_columns].values
-        X.append(seq)
-        clean_timestamps.append(timestamps[i])
-        closes.append(original_closes.iloc[i])
-    X = np.array(X)
-
-    if len(X) == 0:
+    # Same window as the batch path: the 30 bars before the latest one predict the latest bar
+    if len(df) <= sequence_length:
         print("Not enough data to make prediction.")
         return None
 
-    print("Generating predictions...")
-    preds = model.predict(X)
-    predicted_classes_idx = np.argmax(preds, axis=1)
-    predicted_confidences = np.max(preds, axis=1)
-    predicted_classes = encoder.inverse_transform(predicted_classes_idx)
-
-    results = pd.DataFrame({
-        "timestamp": clean_timestamps,
-        "real_close": closes,
-        "signal": predicted_classes,
-        "confidence": predicted_confidences
-    })
+    tail = np.asarray(scaler.transform(df[feature_columns].iloc[-sequence_length - 1:]), dtype=np.float32)
+    X = np.ascontiguousarray(preceding_windows(tail, sequence_length)[-1:])
 
-    if len(results) == 0:
-        return None
+    print("Generating prediction...")
+    preds = np.asarray(model(X, training=False))[0]
+    predicted_class = encoder.inverse_transform([np.argmax(preds)])[0]
 
     return {
-        "timestamp": results.iloc[-1]["timestamp"],
-        "real_close": results.iloc[-1]["real_close"],
-        "signal": results.iloc[-1]["signal"],
-        "confidence": results.iloc[-1]["confidence"]
+        "timestamp": df.index[-1],
+        "real_close": df["Close"].iloc[-1],
+        "signal": predicted_class,
+        "confidence": np.max(preds)
     }
 
 if __name__ == "__main__":
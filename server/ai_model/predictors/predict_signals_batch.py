@@ -1,13 +1,25 @@
 import os
 import numpy as np
 import pandas as pd
-import pickle
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler, LabelEncoder
 from ai_model.preprocessing.indicator_engine import enrich_with_indicators
+from ai_model.predictors.model_registry import model_registry
+from ai_model.preprocessing.windowing import preceding_windows
 
+PREDICT_BATCH_SIZE = int(os.getenv("PREDICT_BATCH_SIZE", 2048))
 
-def predict_signals_batch(ticker: str, user_id: int, df: pd.DataFrame) -> pd.DataFrame:
+
+def iter_prediction_batches(model, windows: np.ndarray, batch_size: int = PREDICT_BATCH_SIZE):
+    """
+    Run the model over `windows` one batch at a time, yielding (offset, class probabilities).
+    Only one batch of windows is materialized at once, so memory stays bounded for any backtest length.
+    """
+    for offset in range(0, len(windows), batch_size):
+        batch = np.ascontiguousarray(windows[offset:offset + batch_size])
+        yield offset, np.asarray(model(batch, training=False))
+
+
+def predict_signals_batch(ticker: str, user_id: int, df: pd.DataFrame, batch_size: int = PREDICT_BATCH_SIZE, progress=None) -> pd.DataFrame:
+    """`progress(fraction)`, if given, is called after every inference batch."""
     sequence_length = 30
     feature_columns = [
         'Open', 'High', 'Low', 'Close', 'Volume',
@@ -16,19 +28,8 @@ def predict_signals_batch(ticker: str, user_id: int, df: pd.DataFrame) -> pd.Dat
         'MACD', 'MACD_Signal', 'BB_Band_Pct', 'ATR'
     ]
 
-    base_path = f"ai_model/models/tf_models/{user_id}_{ticker}"
-    model_path = base_path + ".keras"
-    scaler_path = base_path + "_scaler.pkl"
-    encoder_path = base_path + "_encoder.pkl"
-
-    if not (os.path.exists(model_path) and os.path.exists(scaler_path) and os.path.exists(encoder_path)):
-        raise FileNotFoundError("Required model/scaler/encoder files are missing.")
-
-    model = load_model(model_path)
-    with open(scaler_path, "rb") as f:
-        scaler: MinMaxScaler = pickle.load(f)
-    with open(encoder_path, "rb") as f:
-        encoder: LabelEncoder = pickle.load(f)
+    bundle = model_registry.get(user_id, ticker)
+    model, scaler, encoder = bundle.model, bundle.scaler, bundle.encoder
 
     if df is None or df.empty:
         raise ValueError("Input DataFrame is empty or None.")
@@ -37,37 +38,31 @@ def predict_signals_batch(ticker: str, user_id: int, df: pd.DataFrame) -> pd.Dat
     df = enrich_with_indicators(df)
     df.dropna(inplace=True)
     df = df.sort_index()
-    original_closes = df["Close"].copy()
-    timestamps = df.index.copy()
-
-    df[feature_columns] = scaler.transform(df[feature_columns])
+    original_closes = df["Close"].to_numpy()
+    timestamps = df.index
 
-    sequences = []
-    meta = []
-    for i in range(sequence_length, len(df)):
-        seq = df.iloc[i - sequence_length:i][feature_columns].values
-        sequences.append(seq)
-        meta.append({
-            "timestamp": timestamps[i],
-            "real_close": original_closes.iloc[i]
-        })
+    features = np.asarray(scaler.transform(df[feature_columns]), dtype=np.float32)
+    X = preceding_windows(features, sequence_length)
 
-    if not sequences:
+    if len(X) == 0:
         return pd.DataFrame(columns=["timestamp", "real_close", "signal", "confidence"])
 
-    X = np.array(sequences)
-    predictions = model.predict(X, verbose=0)
-    predicted_labels = np.argmax(predictions, axis=1)
-    confidences = np.max(predictions, axis=1)
+    predicted_labels = np.empty(len(X), dtype=np.int64)
+    confidences = np.empty(len(X), dtype=np.float32)
+    for offset, probabilities in iter_prediction_batches(model, X, batch_size):
+        end = offset + len(probabilities)
+        predicted_labels[offset:end] = np.argmax(probabilities, axis=1)
+        confidences[offset:end] = np.max(probabilities, axis=1)
+        if progress:
+            progress(end / len(X))
+
     decoded_labels = encoder.inverse_transform(predicted_labels)
 
-    output = []
-    for i in range(len(meta)):
-        output.append({
-            "timestamp": meta[i]["timestamp"],
-            "real_close": meta[i]["real_close"],
-            "signal": decoded_labels[i],
-            "confidence": confidences[i]
-        })
+    output = pd.DataFrame({
+        "timestamp": timestamps[sequence_length:],
+        "real_close": original_closes[sequence_length:],
+        "signal": decoded_labels,
+        "confidence": confidences
+    })
 
-    return pd.DataFrame(output).set_index("timestamp")
\ No newline at end of file
+    return output.set_index("timestamp")
\ No newline at end of file
@@ -1,9 +1,8 @@
 import os
-import time
-import requests
 import pandas as pd
 from datetime import timedelta
 from dotenv import load_dotenv
+from data.http_client import http_get
 
 load_dotenv()
 API_KEY = os.getenv("POLYGON_API_KEY")
@@ -11,7 +10,7 @@ API_KEY = os.getenv("POLYGON_API_KEY")
 def fetch_ohlcv_polygon(ticker: str, from_date: str, to_date: str, timespan="hour", multiplier=1, api_key=API_KEY) -> pd.DataFrame:
     url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/{multiplier}/{timespan}/{from_date}/{to_date}"
     params = {"apiKey": api_key, "adjusted": "true", "sort": "asc", "limit": 50000}
-    response = requests.get(url, params=params)
+    response = http_get("polygon", url, params=params)
     data = response.json()
     if "results" not in data:
         print("Response:", data)
@@ -34,7 +33,6 @@ def fetch_ohlcv_range_quarterly(ticker: str, from_date: str, to_date: str, times
         try:
             chunk = fetch_ohlcv_polygon(ticker, current.strftime("%Y-%m-%d"), next_date.strftime("%Y-%m-%d"), timespan, multiplier, api_key)
             all_data.append(chunk)
-            time.sleep(15)
         except Exception as e:
             print(f"Range {current.date()} — {next_date.date()} skipped due to error: {e}")
         current = next_date + timedelta(days=1)
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def feature_matrix(df: pd.DataFrame, columns: list[str]) -> np.ndarray:
+    """Contiguous float32 (rows, features) matrix the windows are built on."""
+    return np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+
+
+def sliding_windows(features: np.ndarray, sequence_length: int) -> np.ndarray:
+    """
+    Zero-copy (n - sequence_length + 1, sequence_length, features) view: window k holds rows [k, k + sequence_length).
+    The result is read-only; copy a slice before modifying it.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    if len(features) < sequence_length:
+        return np.empty((0, sequence_length, features.shape[1]), dtype=np.float32)
+    return sliding_window_view(features, sequence_length, axis=0).transpose(0, 2, 1)
+
+
+def preceding_windows(features: np.ndarray, sequence_length: int) -> np.ndarray:
+    """
+    Windows that predict a row from the sequence_length rows before it: window k predicts row k + sequence_length.
+    This is the layout used for training, batch backtests and live prediction.
+    """
+    return sliding_windows(features, sequence_length)[:-1]
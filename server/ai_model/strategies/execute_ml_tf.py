@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from utils.backtest_run import BacktestRun, EXIT_OPEN, EXIT_SIGNAL, first_true, make_run
 
 TAKE_PROFIT = 1.0 
 STOP_LOSS = -0.5   
@@ -6,76 +8,52 @@ MIN_CONFIDENCE = 0.4
 # ALLOWED_HOURS = [9, 10, 11, 12, 13, 14, 15, 16, 17]  # UTC hours for trading
 OFFSET_TICKS = 3
 
-def execute_conservative_strategy(df: pd.DataFrame) -> tuple[list[dict], list[dict], str | None, float | None]:
-    df = df.copy()
+def execute_conservative_strategy(df: pd.DataFrame) -> BacktestRun:
+    """
+    Conservative ML rules over the bars with confidence >= MIN_CONFIDENCE: open on a buy/sell signal,
+    close at TAKE_PROFIT / STOP_LOSS (percent, at the close) or on the opposite signal, then sit out
+    OFFSET_TICKS bars. Trades are found by jumping between events rather than stepping through bars.
+    All closes are reported as signal exits ("closed"), as the conservative rules always have.
+    """
     df = df.sort_index()
     df = df[df["confidence"] >= MIN_CONFIDENCE]
     # df = df[df.index.hour.isin(ALLOWED_HOURS)]
 
-    trades = []
-    equity_curve = []
-
-    position = None
-    entry_price = None
-    entry_time = None
-    cooldown = 0
-    cumulative = 0.0
-
-    for timestamp, row in df.iterrows():
-        signal = row["signal"]
-        price = row["real_close"]
-
-        if cooldown > 0:
-            cooldown -= 1
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative, 4)})
-            continue
-
-        if position is None:
-            if signal == "buy":
-                position = "long"
-                entry_price = price
-                entry_time = timestamp
-                trades.append({"action": "buy", "price": round(price, 2), "result": "opened", "pnl": 0, "time": timestamp})
-            elif signal == "sell":
-                position = "short"
-                entry_price = price
-                entry_time = timestamp
-                trades.append({"action": "sell", "price": round(price, 2), "result": "opened", "pnl": 0, "time": timestamp})
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative, 4)})
-            continue
-
-        change = ((price - entry_price) / entry_price * 100) if position == "long" else ((entry_price - price) / entry_price * 100)
-        if change >= TAKE_PROFIT or change <= STOP_LOSS:
-            pnl = change
-            cumulative += pnl
-            trades.append({"action": "sell" if position == "long" else "buy", "price": round(price, 2),
-                           "result": "closed", "pnl": round(pnl, 4), "time": timestamp})
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative, 4)})
-            position = None
-            entry_price = None
-            entry_time = None
-            cooldown = OFFSET_TICKS
-            continue
-
-        if (position == "long" and signal == "sell") or (position == "short" and signal == "buy"):
-            pnl = ((price - entry_price) / entry_price * 100) if position == "long" else ((entry_price - price) / entry_price * 100)
-            cumulative += pnl
-            trades.append({"action": "sell" if position == "long" else "buy", "price": round(price, 2),
-                           "result": "closed", "pnl": round(pnl, 4), "time": timestamp})
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative, 4)})
-            position = None
-            entry_price = None
-            entry_time = None
-            cooldown = OFFSET_TICKS
-            continue
-
-        if position == "long":
-            unrealized = (price - entry_price) / entry_price * 100
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative + unrealized, 4)})
-        elif position == "short":
-            unrealized = (entry_price - price) / entry_price * 100
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative + unrealized, 4)})
-        else:
-            equity_curve.append({"date": timestamp.isoformat(), "pnl": round(cumulative, 4)})
-
-    return trades, equity_curve, position, entry_price
\ No newline at end of file
+    price = df["real_close"].to_numpy(dtype="f8")
+    signal = np.select([df["signal"] == "buy", df["signal"] == "sell"], [1, -1], 0).astype(np.int8)
+    n = len(price)
+    signal_bars = np.flatnonzero(signal)
+
+    entries, exits, sides, reasons, pnls = [], [], [], [], []
+    i = 0
+    while i < n:
+        k = int(np.searchsorted(signal_bars, i))
+        if k == len(signal_bars):
+            break
+        entry = int(signal_bars[k])
+        side = int(signal[entry])
+        entry_price = price[entry]
+
+        def change(lo, hi):
+            return ((price[lo:hi] - entry_price) / entry_price * 100) if side == 1 else ((entry_price - price[lo:hi]) / entry_price * 100)
+
+        def exit_hits(lo, hi):
+            moved = change(lo, hi)
+            return (moved >= TAKE_PROFIT) | (moved <= STOP_LOSS) | (signal[lo:hi] == -side)
+
+        exit_bar = first_true(exit_hits, entry + 1, n)
+
+        entries.append(entry)
+        sides.append(side)
+        if exit_bar == n:
+            exits.append(-1)
+            reasons.append(EXIT_OPEN)
+            pnls.append(0.0)
+            break
+
+        exits.append(exit_bar)
+        reasons.append(EXIT_SIGNAL)
+        pnls.append(float(change(exit_bar, exit_bar + 1)[0]))
+        i = exit_bar + 1 + OFFSET_TICKS
+
+    return make_run(df.index, price, entries, exits, sides, reasons, pnls)
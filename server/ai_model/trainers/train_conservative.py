@@ -13,6 +13,7 @@ import pickle
 
 from ai_model.preprocessing.data_fetcher import fetch_ohlcv_range_quarterly
 from ai_model.preprocessing.indicator_engine import enrich_with_indicators
+from ai_model.preprocessing.windowing import feature_matrix, preceding_windows
 
 load_dotenv()
 
@@ -39,13 +40,9 @@ def generate_labels(df: pd.DataFrame, horizon=HORIZON) -> pd.DataFrame:
 
 
 def prepare_sequences(df: pd.DataFrame, sequence_length: int):
-    X, y = [], []
-    for i in range(len(df) - sequence_length):
-        seq_x = df.iloc[i:i + sequence_length][FEATURE_COLUMNS].values
-        label = df.iloc[i + sequence_length]["Label"]
-        X.append(seq_x)
-        y.append(label)
-    return np.array(X), np.array(y)
+    X = preceding_windows(feature_matrix(df, FEATURE_COLUMNS), sequence_length)
+    y = df["Label"].to_numpy()[sequence_length:]
+    return X, y
 
 
 def build_classifier_model(input_shape, num_classes):
@@ -0,0 +1,51 @@
+"""Add backtest_results table for backtest jobs
+
+Revision ID: 4c1d7e9a2b60
+Revises: b32d89e00d6c
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1d7e9a2b60'
+down_revision: Union[str, None] = 'b32d89e00d6c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('backtest_results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('strategy_id', sa.Integer(), nullable=False),
+    sa.Column('strategy_version', sa.String(length=64), nullable=False),
+    sa.Column('ticker', sa.String(), nullable=False),
+    sa.Column('timeframe', sa.String(), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('metrics', sa.JSON(), nullable=True),
+    sa.Column('equity_curve', sa.JSON(), nullable=True),
+    sa.Column('trades', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['strategy_id'], ['strategies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_backtest_results_id'), 'backtest_results', ['id'], unique=False)
+    op.create_index('ix_backtest_results_lookup', 'backtest_results', ['strategy_id', 'strategy_version', 'ticker', 'timeframe', 'start_date', 'end_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_backtest_results_lookup', table_name='backtest_results')
+    op.drop_index(op.f('ix_backtest_results_id'), table_name='backtest_results')
+    op.drop_table('backtest_results')
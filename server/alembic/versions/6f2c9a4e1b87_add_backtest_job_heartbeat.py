@@ -0,0 +1,30 @@
+"""Add worker and heartbeat columns to backtest_results
+
+Revision ID: 6f2c9a4e1b87
+Revises: d5b8e2a07f13
+Create Date: 2026-10-18 18:37:26.514083
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2c9a4e1b87'
+down_revision: Union[str, None] = 'd5b8e2a07f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('backtest_results', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('backtest_results', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_backtest_results_status', 'backtest_results', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_backtest_results_status', table_name='backtest_results')
+    op.drop_column('backtest_results', 'heartbeat_at')
+    op.drop_column('backtest_results', 'worker_id')
@@ -0,0 +1,38 @@
+"""Add composite lookup indexes to trade_logs and signal_logs, make signal_logs.created_at non-nullable
+
+Revision ID: 9e3a5f71c2d4
+Revises: 4c1d7e9a2b60
+Create Date: 2026-10-18 12:04:17.583920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3a5f71c2d4'
+down_revision: Union[str, None] = '4c1d7e9a2b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination orders by created_at; legacy rows without one sort as the oldest
+    op.execute("UPDATE signal_logs SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL")
+    op.alter_column('signal_logs', 'created_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_trade_logs_user_strategy_symbol_timestamp', 'trade_logs', ['user_id', 'strategy_id', 'symbol', 'timestamp'], unique=False)
+    op.create_index('ix_trade_logs_user_timestamp', 'trade_logs', ['user_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_signal_logs_strategy_ticker_created', 'signal_logs', ['strategy_id', 'ticker', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_signal_logs_strategy_user_created', 'signal_logs', ['strategy_id', 'user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_signal_logs_strategy_lower_ticker_created', 'signal_logs', ['strategy_id', sa.text('lower(ticker)'), sa.text('created_at DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_signal_logs_strategy_lower_ticker_created', table_name='signal_logs')
+    op.drop_index('ix_signal_logs_strategy_user_created', table_name='signal_logs')
+    op.drop_index('ix_signal_logs_strategy_ticker_created', table_name='signal_logs')
+    op.drop_index('ix_trade_logs_user_timestamp', table_name='trade_logs')
+    op.drop_index('ix_trade_logs_user_strategy_symbol_timestamp', table_name='trade_logs')
+    op.alter_column('signal_logs', 'created_at', existing_type=sa.DateTime(), nullable=True)
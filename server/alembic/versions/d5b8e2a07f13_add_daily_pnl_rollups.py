@@ -0,0 +1,41 @@
+"""Add daily_pnl_rollups table
+
+Revision ID: d5b8e2a07f13
+Revises: 9e3a5f71c2d4
+Create Date: 2026-10-18 13:21:45.106733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b8e2a07f13'
+down_revision: Union[str, None] = '9e3a5f71c2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_pnl_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('strategy_id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('pnl', sa.Float(), nullable=False),
+    sa.Column('trades', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['strategy_id'], ['strategies.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'strategy_id', 'symbol', 'day', name='uq_daily_pnl_rollups_bucket')
+    )
+    op.create_index(op.f('ix_daily_pnl_rollups_id'), 'daily_pnl_rollups', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_daily_pnl_rollups_id'), table_name='daily_pnl_rollups')
+    op.drop_table('daily_pnl_rollups')
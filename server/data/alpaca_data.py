@@ -1,14 +1,17 @@
-import requests
+import numpy as np
 import pandas as pd
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+from data.bar_store import read_bars, read_bars_batch
+from data.http_client import http_get
 
 load_dotenv()
 
 ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
 ALPACA_SECRET_KEY = os.getenv("ALPACA_API_SECRET")
 ALPACA_BASE_URL = "https://data.alpaca.markets/v2/stocks/bars"
+ALPACA_PAGE_LIMIT = 10000
 
 
 def fetch_history_alpaca(
@@ -17,17 +20,74 @@ def fetch_history_alpaca(
     end: datetime,
     timeframe: str = "1Hour"
 ) -> pd.DataFrame:
+    """
+    Historical bars served from the local bar store; only the uncovered part of the range hits Alpaca.
+    """
+    return read_bars(symbol, timeframe, start, end, download=iter_history_alpaca)
+
+
+def fetch_history_batch_alpaca(
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timeframe: str = "1Hour"
+) -> dict[str, pd.DataFrame]:
+    """
+    Historical bars for several symbols; whatever the local store is missing is downloaded in one batched request.
+    """
+    return read_bars_batch(symbols, timeframe, start, end, download_batch=download_bars_batch_alpaca)
+
+
+def iter_history_alpaca(
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    timeframe: str = "1Hour"
+):
+    """
+    Yield bars page by page as Alpaca returns them, following next_page_token.
+    Only one page of JSON is held at a time, so long minute-level ranges are neither truncated nor buffered whole.
+    """
+    for page in _iter_bar_pages([symbol], start, end, timeframe):
+        bars = page.get(symbol)
+        if bars:
+            yield _bars_to_frame(bars)
+
+
+def download_bars_batch_alpaca(
+    symbols: list[str],
+    start: datetime,
+    end: datetime,
+    timeframe: str = "1Hour"
+) -> dict[str, pd.DataFrame]:
+    """
+    Download bars for several symbols with one multi-symbol request, following next_page_token.
+    Symbols without bars in the range get an empty DataFrame.
+    """
+    chunks = {symbol: [] for symbol in symbols}
+    pages = 0
+    for page in _iter_bar_pages(symbols, start, end, timeframe):
+        pages += 1
+        for symbol, bars in page.items():
+            if bars:
+                chunks.setdefault(symbol, []).append(_bars_to_frame(bars))
+
+    print(f"Alpaca batch: {len(symbols)} symbols ({timeframe}) in {pages} page(s)")
+    return {symbol: pd.concat(frames) if frames else pd.DataFrame() for symbol, frames in chunks.items()}
+
+
+def _iter_bar_pages(symbols: list[str], start: datetime, end: datetime, timeframe: str):
     headers = {
         "APCA-API-KEY-ID": ALPACA_API_KEY,
         "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY,
     }
 
     params = {
-        "symbols": symbol,
+        "symbols": ",".join(symbols),
         "timeframe": timeframe,
         "start": start.replace(tzinfo=None).isoformat() + "Z",
         "end": end.replace(tzinfo=None).isoformat() + "Z",
-        "limit": 10000,
+        "limit": ALPACA_PAGE_LIMIT,
         "feed": "iex",
         "adjustment": "raw",
         "sort": "asc"
@@ -35,31 +95,32 @@ def fetch_history_alpaca(
 
     print("🔗 Alpaca Params:", params)
 
-    response = requests.get(ALPACA_BASE_URL, headers=headers, params=params)
-    response.raise_for_status()
-    data = response.json()
+    while True:
+        response = http_get("alpaca", ALPACA_BASE_URL, headers=headers, params=params)
+        response.raise_for_status()
+        data = response.json()
 
-    if symbol not in data.get("bars", {}):
-        print(f"No data for {symbol}")
-        return pd.DataFrame()
+        yield data.get("bars") or {}
+
+        token = data.get("next_page_token")
+        if not token:
+            break
+        params["page_token"] = token
 
-    bars = data["bars"][symbol]
 
-    records = [
+def _bars_to_frame(bars: list[dict]) -> pd.DataFrame:
+    if not bars:
+        return pd.DataFrame()
+
+    n = len(bars)
+    df = pd.DataFrame(
         {
-            "Date": bar["t"],
-            "Open": bar["o"],
-            "High": bar["h"],
-            "Low": bar["l"],
-            "Close": bar["c"],
-            "Volume": bar["v"]
-        }
-        for bar in bars
-    ]
-
-    df = pd.DataFrame(records)
-    df["Date"] = pd.to_datetime(df["Date"])
-    df.set_index("Date", inplace=True)
-
-    print(f"Получено {len(df)} записей по {symbol} с Alpaca")
-    return df
\ No newline at end of file
+            "Open": np.fromiter((bar["o"] for bar in bars), dtype="f8", count=n),
+            "High": np.fromiter((bar["h"] for bar in bars), dtype="f8", count=n),
+            "Low": np.fromiter((bar["l"] for bar in bars), dtype="f8", count=n),
+            "Close": np.fromiter((bar["c"] for bar in bars), dtype="f8", count=n),
+            "Volume": np.fromiter((bar["v"] for bar in bars), dtype="f8", count=n),
+        },
+        index=pd.DatetimeIndex(pd.to_datetime([bar["t"] for bar in bars]), name="Date")
+    )
+    return df
@@ -1,14 +1,7 @@
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
-ALPACA_SECRET_KEY = os.getenv("ALPACA_API_SECRET")
-ALPACA_BASE_URL = "https://data.alpaca.markets/v2/stocks/bars"
+from data.alpaca_data import iter_history_alpaca, download_bars_batch_alpaca
+from data.bar_store import read_bars, read_bars_batch
 
 def fetch_intraday_alpaca(
     symbol: str,
@@ -17,52 +10,27 @@ def fetch_intraday_alpaca(
     end_date: datetime = None
 ) -> pd.DataFrame:
     """
-    Download intraday market data from Alpaca API.
+    Intraday market data from the local bar store; only bars newer than the last stored one are downloaded from Alpaca.
     """
     end = end_date or datetime.utcnow()
-    start = start_date or (end - timedelta(days=7)) 
-
-    headers = {
-        "APCA-API-KEY-ID": ALPACA_API_KEY,
-        "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY
-    }
+    start = start_date or (end - timedelta(days=7))
 
-    params = {
-        "symbols": symbol,
-        "timeframe": timeframe,
-        "start": start.isoformat() + "Z",
-        "end": end.isoformat() + "Z",
-        "limit": 10000, 
-        "feed": "iex",
-        "adjustment": "raw",
-        "sort": "asc"
-    }
+    df = read_bars(symbol, timeframe, start, end, download=iter_history_alpaca)
 
-    response = requests.get(ALPACA_BASE_URL, headers=headers, params=params)
-    response.raise_for_status()
-    json_data = response.json()
+    print(f"Recieved {len(df)} candles {symbol}")
+    return df
 
-    if symbol not in json_data.get("bars", {}):
-        print(f"No data for {symbol}")
-        return pd.DataFrame()
 
-    bars = json_data["bars"][symbol]
-
-    records = [
-        {
-            "Date": bar["t"],
-            "Open": bar["o"],
-            "High": bar["h"],
-            "Low": bar["l"],
-            "Close": bar["c"],
-            "Volume": bar["v"]
-        }
-        for bar in bars
-    ]
-
-    df = pd.DataFrame(records)
-    df["Date"] = pd.to_datetime(df["Date"])
-    df.set_index("Date", inplace=True)
+def fetch_intraday_batch_alpaca(
+    symbols: list[str],
+    timeframe: str = "5Min",
+    start_date: datetime = None,
+    end_date: datetime = None
+) -> dict[str, pd.DataFrame]:
+    """
+    Intraday data for several symbols sharing a timeframe and window, fetched with one batched Alpaca request.
+    """
+    end = end_date or datetime.utcnow()
+    start = start_date or (end - timedelta(days=7))
 
-    print(f"Recieved {len(df)} candles {symbol} from Alpaca")
-    return df
\ No newline at end of file
+    return read_bars_batch(symbols, timeframe, start, end, download_batch=download_bars_batch_alpaca)
@@ -0,0 +1,82 @@
+import threading
+from collections import defaultdict
+import pandas as pd
+from datetime import datetime, timedelta
+from data.automation_data import fetch_intraday_alpaca, fetch_intraday_batch_alpaca
+
+
+class BarCache:
+    """
+    Tick-scoped bar store: every (symbol, timeframe, window) series is downloaded once per
+    scheduler pass and shared by all strategies that watch it.
+
+    The window is anchored to the tick time, so all consumers in one pass see the same bars.
+    Consumers get a shallow copy: adding indicator columns is safe, writing into the
+    OHLCV columns in place is not.
+    """
+
+    def __init__(self, now: datetime = None, fetch=fetch_intraday_alpaca, fetch_batch=fetch_intraday_batch_alpaca):
+        self.now = now or datetime.utcnow()
+        self._fetch = fetch
+        self._fetch_batch = fetch_batch
+        self._frames = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, timeframe: str, days: int) -> pd.DataFrame:
+        key = (symbol, timeframe, days)
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Per-key lock so parallel workers asking for the same series wait for one download
+        with key_lock:
+            with self._lock:
+                cached = key in self._frames
+                if cached:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+            if not cached:
+                df = self._fetch(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    start_date=self.now - timedelta(days=days),
+                    end_date=self.now
+                )
+                with self._lock:
+                    self._frames[key] = df if df is not None else pd.DataFrame()
+
+        return self._frames[key].copy(deep=False)
+
+    def prefetch(self, series: list[tuple[str, str, int]]):
+        """
+        Load (symbol, timeframe, days) series up front, one batched request per (timeframe, days) group.
+        Called before the workers start, so later get() calls are cache hits.
+        """
+        groups = defaultdict(set)
+        with self._lock:
+            for symbol, timeframe, days in series:
+                if (symbol, timeframe, days) not in self._frames:
+                    groups[(timeframe, days)].add(symbol)
+
+        for (timeframe, days), symbols in groups.items():
+            frames = self._fetch_batch(
+                sorted(symbols),
+                timeframe=timeframe,
+                start_date=self.now - timedelta(days=days),
+                end_date=self.now
+            )
+            with self._lock:
+                for symbol in symbols:
+                    key = (symbol, timeframe, days)
+                    if key not in self._frames:
+                        self._frames[key] = frames.get(symbol, pd.DataFrame())
+                        self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"series": len(self._frames), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,263 @@
+import os
+import glob
+import json
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "data/bar_store")
+# Superseded data files left behind by a concurrent writer are removed after this many seconds
+STALE_GENERATION_SECONDS = 3600
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+BAR_DTYPE = np.dtype([("t", "<i8")] + [(col, "<f8") for col in BAR_COLUMNS])
+
+_key_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _key_lock(symbol: str, timeframe: str) -> threading.Lock:
+    with _locks_guard:
+        return _key_locks.setdefault((symbol, timeframe), threading.Lock())
+
+
+def _paths(symbol: str, timeframe: str) -> tuple[str, str]:
+    """Legacy data path (stores written before data files were versioned) and metadata path."""
+    base = os.path.join(BAR_STORE_DIR, timeframe, symbol.upper())
+    return base + ".npy", base + ".json"
+
+
+def _read_meta(symbol: str, timeframe: str) -> dict | None:
+    legacy_data_path, meta_path = _paths(symbol, timeframe)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    data_path = os.path.join(os.path.dirname(meta_path), meta["file"]) if "file" in meta else legacy_data_path
+    return {**meta, "path": data_path}
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    value = pd.Timestamp(value)
+    if value.tzinfo is not None:
+        value = value.tz_convert("UTC").tz_localize(None)
+    return value.to_pydatetime()
+
+
+def frame_to_records(df: pd.DataFrame) -> np.ndarray:
+    if df is None or df.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    index = pd.DatetimeIndex(df.index)
+    index = index.tz_convert("UTC") if index.tz is not None else index.tz_localize("UTC")
+
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records["t"] = index.asi8
+    for col in BAR_COLUMNS:
+        records[col] = df[col].to_numpy(dtype="f8")
+    return records
+
+
+def records_to_frame(records: np.ndarray) -> pd.DataFrame:
+    if len(records) == 0:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(
+        {col: np.array(records[col]) for col in BAR_COLUMNS},
+        index=pd.DatetimeIndex(pd.to_datetime(records["t"], utc=True), name="Date")
+    )
+    return df
+
+
+def download_records(result) -> np.ndarray:
+    """Collect a download result, either one DataFrame or an iterable of page DataFrames, into bar records."""
+    if result is None or isinstance(result, pd.DataFrame):
+        return frame_to_records(result)
+
+    pages = [frame_to_records(page) for page in result]
+    return np.concatenate(pages) if pages else np.empty(0, dtype=BAR_DTYPE)
+
+
+def merge_records(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Merge two bar arrays by timestamp; rows from `new` replace stored ones (e.g. a bar that was still forming)."""
+    merged = np.concatenate([existing, new])
+    merged = merged[np.argsort(merged["t"], kind="stable")]
+    keep = np.ones(len(merged), dtype=bool)
+    keep[:-1] = merged["t"][:-1] != merged["t"][1:]
+    return merged[keep]
+
+
+def load_bars(symbol: str, timeframe: str):
+    """Return (memory-mapped bars, coverage) or (None, None) when nothing is stored yet."""
+    for _ in range(2):
+        meta = _read_meta(symbol, timeframe)
+        if meta is None:
+            return None, None
+        try:
+            records = np.load(meta["path"], mmap_mode="r")
+        except FileNotFoundError:
+            # Another process swapped in a new generation and removed this one; read the new metadata
+            continue
+        return records, (datetime.fromisoformat(meta["start"]), datetime.fromisoformat(meta["end"]))
+    return None, None
+
+
+def save_bars(symbol: str, timeframe: str, records: np.ndarray, start: datetime, end: datetime):
+    """
+    Write a new generation of the bars under a unique file name, then atomically replace the metadata
+    that names it together with its coverage. Data and coverage therefore always change in one step,
+    concurrent writers (other processes, sweep workers) never share a temp file, and readers holding a
+    mmap of the previous generation keep a consistent file.
+    """
+    _, meta_path = _paths(symbol, timeframe)
+    directory = os.path.dirname(meta_path)
+    os.makedirs(directory, exist_ok=True)
+    previous = _read_meta(symbol, timeframe)
+
+    prefix = symbol.upper() + "."
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=prefix, suffix=".npy", delete=False) as f:
+        np.save(f, records)
+        data_path = f.name
+
+    with tempfile.NamedTemporaryFile("w", dir=directory, prefix=prefix, suffix=".json.tmp", delete=False) as f:
+        json.dump({"start": start.isoformat(), "end": end.isoformat(), "file": os.path.basename(data_path)}, f)
+    os.replace(f.name, meta_path)
+
+    if previous and previous["path"] != data_path:
+        _remove_quietly(previous["path"])
+    _remove_stale_generations(symbol, timeframe, data_path)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_stale_generations(symbol: str, timeframe: str, current: str):
+    """Data files superseded by a concurrent writer's save; mapped readers keep theirs open on POSIX."""
+    _, meta_path = _paths(symbol, timeframe)
+    prefix = symbol.upper() + "."
+    pattern = os.path.join(os.path.dirname(meta_path), glob.escape(prefix) + "*.npy")
+    cutoff = time.time() - STALE_GENERATION_SECONDS
+    for path in glob.glob(pattern):
+        # "BRK.<generation>.npy" must not pick up "BRK.B.<generation>.npy"
+        generation = os.path.basename(path)[len(prefix):-len(".npy")]
+        if "." in generation or path == current:
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                _remove_quietly(path)
+        except OSError:
+            pass
+
+
+def _plan_update(records, coverage, start: datetime, end: datetime):
+    """Ranges of [start, end] the store does not cover yet, and the coverage after downloading them."""
+    if records is None:
+        return [(start, end)], (start, end)
+
+    covered_start, covered_end = coverage
+    missing = []
+    if start < covered_start:
+        missing.append((start, covered_start))
+    if end > covered_end:
+        tail_from = covered_end
+        if len(records):
+            tail_from = pd.Timestamp(int(records["t"][-1])).to_pydatetime()
+        missing.append((tail_from, end))
+    return missing, (min(start, covered_start), max(end, covered_end))
+
+
+def _slice_frame(records: np.ndarray, start: datetime, end: datetime) -> pd.DataFrame:
+    lo = np.searchsorted(records["t"], pd.Timestamp(start).value, side="left")
+    hi = np.searchsorted(records["t"], pd.Timestamp(end).value, side="right")
+    return records_to_frame(records[lo:hi])
+
+
+def _normalize_range(start: datetime, end: datetime) -> tuple[datetime, datetime]:
+    start = to_utc_naive(start)
+    end = min(to_utc_naive(end), datetime.now(timezone.utc).replace(tzinfo=None))
+    return start, end
+
+
+def read_bars(symbol: str, timeframe: str, start: datetime, end: datetime, download) -> pd.DataFrame:
+    """
+    Serve bars for [start, end] from the local store, downloading only what is not covered yet.
+
+    `download(symbol, start, end, timeframe)` is called for the missing head and/or tail of the range and
+    may return a DataFrame or yield page DataFrames, which are packed into compact records as they arrive.
+    The tail is requested from the last stored bar on, so a bar that was still forming gets refreshed.
+    """
+    start, end = _normalize_range(start, end)
+
+    with _key_lock(symbol, timeframe):
+        records, coverage = load_bars(symbol, timeframe)
+        missing, (new_start, new_end) = _plan_update(records, coverage, start, end)
+        if records is None:
+            records = np.empty(0, dtype=BAR_DTYPE)
+
+        if missing:
+            fetched = [download_records(download(symbol, lo, hi, timeframe)) for lo, hi in missing]
+            records = merge_records(np.asarray(records), np.concatenate(fetched))
+            save_bars(symbol, timeframe, records, new_start, new_end)
+
+        return _slice_frame(records, start, end)
+
+
+def read_bars_batch(symbols: list[str], timeframe: str, start: datetime, end: datetime, download_batch) -> dict[str, pd.DataFrame]:
+    """
+    Same as read_bars for several symbols. Missing heads and missing tails are each fetched with
+    one `download_batch(symbols, start, end, timeframe)` call spanning all symbols that need them.
+    """
+    start, end = _normalize_range(start, end)
+    symbols = sorted(set(symbols))
+
+    # Lock in a fixed order so concurrent batches over overlapping symbols cannot deadlock
+    locks = [_key_lock(symbol, timeframe) for symbol in symbols]
+    for lock in locks:
+        lock.acquire()
+    try:
+        stored = {}
+        plans = {}
+        for symbol in symbols:
+            records, coverage = load_bars(symbol, timeframe)
+            plans[symbol] = _plan_update(records, coverage, start, end)
+            stored[symbol] = np.empty(0, dtype=BAR_DTYPE) if records is None else records
+
+        # A missing range starting at `start` is a head (or the whole range); anything else is a tail
+        heads, tails = {}, {}
+        for symbol, (missing, _) in plans.items():
+            for lo, hi in missing:
+                (heads if lo == start else tails)[symbol] = (lo, hi)
+
+        fetched = {symbol: [] for symbol in symbols}
+        for group in (heads, tails):
+            if not group:
+                continue
+            lo = min(r[0] for r in group.values())
+            hi = max(r[1] for r in group.values())
+            for symbol, df in download_batch(list(group), lo, hi, timeframe).items():
+                if symbol in fetched:
+                    fetched[symbol].append(frame_to_records(df))
+
+        frames = {}
+        for symbol in symbols:
+            records = stored[symbol]
+            missing, (new_start, new_end) = plans[symbol]
+            if missing:
+                records = merge_records(np.asarray(records), np.concatenate(fetched[symbol] or [np.empty(0, dtype=BAR_DTYPE)]))
+                save_bars(symbol, timeframe, records, new_start, new_end)
+            frames[symbol] = _slice_frame(records, start, end)
+        return frames
+    finally:
+        for lock in reversed(locks):
+            lock.release()
@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 16))
+HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", 8))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 4))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", 0.5))
+
+# Requests per minute allowed by each market-data provider (Alpaca basic plan, Polygon free tier)
+PROVIDER_RATE_LIMITS = {
+    "alpaca": int(os.getenv("ALPACA_RATE_LIMIT", 200)),
+    "polygon": int(os.getenv("POLYGON_RATE_LIMIT", 5)),
+}
+
+
+class TokenBucket:
+    """Blocking token bucket: `capacity` requests in a burst, refilled at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: int, capacity: int = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _build_session() -> requests.Session:
+    # No adapter-level retries: they would re-send below the rate limiter, see http_get
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _build_session()
+_concurrency = threading.BoundedSemaphore(HTTP_MAX_CONCURRENCY)
+_buckets = {provider: TokenBucket(limit) for provider, limit in PROVIDER_RATE_LIMITS.items()}
+
+
+def _retry_delay(response: requests.Response | None, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return HTTP_BACKOFF * (2 ** attempt)
+
+
+def http_get(provider: str, url: str, **kwargs) -> requests.Response:
+    """
+    GET through the shared keep-alive session: rate-limited per provider, bounded in concurrency,
+    and retried with exponential backoff (or Retry-After) on 429/5xx and connection errors.
+    Every attempt, retries included, takes a token from the provider's bucket.
+    """
+    bucket = _buckets.get(provider)
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+
+    for attempt in range(HTTP_RETRIES + 1):
+        if bucket:
+            bucket.acquire()
+
+        response = None
+        try:
+            with _concurrency:
+                response = _session.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == HTTP_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == HTTP_RETRIES:
+                return response
+
+        time.sleep(_retry_delay(response, attempt))
@@ -4,6 +4,8 @@ import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from functools import lru_cache
+from data.http_client import http_get
+from utils.indicators import add_indicators, MARKET_DATA_COLUMNS
 
 load_dotenv()
 
@@ -39,7 +41,7 @@ class MarketData:
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = http_get("polygon", url, params=params)
             response.raise_for_status()
             data = response.json()
 
@@ -75,7 +77,7 @@ class MarketData:
             try:
                 url = f"https://api.polygon.io/v1/indicators/{indicator}/{ticker}"
                 params = {"apiKey": POLYGON_API_KEY}
-                response = requests.get(url, params=params)
+                response = http_get("polygon", url, params=params)
                 response.raise_for_status()
                 data = response.json()
 
@@ -89,22 +91,5 @@ class MarketData:
 
     @staticmethod
     def calculate_indicators(df):
-        df['SMA_10'] = df['Close'].rolling(window=10, min_periods=1).mean()
-        df['SMA_50'] = df['Close'].rolling(window=50, min_periods=1).mean()
-        df['EMA_10'] = df['Close'].ewm(span=10, adjust=False).mean()
-        df['EMA_50'] = df['Close'].ewm(span=50, adjust=False).mean()
-
-        delta = df['Close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14, min_periods=1).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=14, min_periods=1).mean()
-        rs = gain / (loss + 1e-10)
-        df['RSI_14'] = 100 - (100 / (1 + rs))
-
-        short_ema = df['Close'].ewm(span=12, adjust=False).mean()
-        long_ema = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = short_ema - long_ema
-        df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df["Volatility"] = df["High"] - df["Low"]
-        df["Daily_Return"] = (df["Close"] - df["Open"]) / df["Open"]
-
+        add_indicators(df, MARKET_DATA_COLUMNS)
         return df
\ No newline at end of file
@@ -21,11 +21,18 @@ from routes.settings import settings_router
 
 # Import scheduler
 from scheduler import start_strategy_scheduler
+from services.backtest_jobs import fail_interrupted_jobs
+from utils.pagination import NEXT_CURSOR_HEADER
 
 start_strategy_scheduler()
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def fail_stale_backtest_jobs():
+    fail_interrupted_jobs()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(stock_router) 
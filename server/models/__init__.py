@@ -5,4 +5,6 @@ from models.trade_log import TradeLog
 from models.signal_log import SignalLog
 from models.strategy_ticker import StrategyTicker
 from models.broker import UserBroker
-from models.user_preferences import UserPreferences
\ No newline at end of file
+from models.user_preferences import UserPreferences
+from models.backtest_result import BacktestResult
+from models.daily_pnl import DailyPnl
\ No newline at end of file
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Index
+from datetime import datetime
+from database import Base
+
+class BacktestResult(Base):
+    """A backtest job and, once it is done, its persisted result."""
+    __tablename__ = "backtest_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    strategy_id = Column(Integer, ForeignKey("strategies.id", ondelete="CASCADE"), nullable=False)
+
+    # Hash of the strategy fields the backtest depends on; see services.backtest_jobs.strategy_version
+    strategy_version = Column(String(64), nullable=False)
+    ticker = Column(String, nullable=False)
+    timeframe = Column(String, nullable=False)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False)
+
+    status = Column(String, nullable=False, default="queued")  # queued | running | done | failed | cancelled
+    progress = Column(Float, nullable=False, default=0.0)
+    error = Column(String, nullable=True)
+
+    metrics = Column(JSON, nullable=True)
+    equity_curve = Column(JSON, nullable=True)
+    trades = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Process that owns a queued or running job, and when it last reported the job alive
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_backtest_results_lookup", "strategy_id", "strategy_version", "ticker", "timeframe", "start_date", "end_date"),
+        Index("ix_backtest_results_status", "status"),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+from database import Base
+
+class DailyPnl(Base):
+    """Closed-trade PnL per user, strategy, symbol and day; maintained by services.pnl_rollup."""
+    __tablename__ = "daily_pnl_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    strategy_id = Column(Integer, ForeignKey("strategies.id", ondelete="CASCADE"), nullable=False)
+    symbol = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+
+    pnl = Column(Float, nullable=False, default=0.0)
+    trades = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "strategy_id", "symbol", "day", name="uq_daily_pnl_rollups_bucket"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -18,7 +18,14 @@ class SignalLog(Base):
     executed = Column(Boolean, default=False)
     result = Column(String, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     strategy = relationship("Strategy", back_populates="signals")
-    user = relationship("User", back_populates="signals")
\ No newline at end of file
+    user = relationship("User", back_populates="signals")
+
+    __table_args__ = (
+        Index("ix_signal_logs_strategy_ticker_created", "strategy_id", "ticker", created_at.desc()),
+        Index("ix_signal_logs_strategy_user_created", "strategy_id", "user_id", created_at.desc(), id.desc()),
+        # /signals/last matches tickers case-insensitively
+        Index("ix_signal_logs_strategy_lower_ticker_created", "strategy_id", func.lower(ticker), created_at.desc()),
+    )
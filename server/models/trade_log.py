@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index, func
 from database import Base
 
 class TradeLog(Base):
@@ -18,4 +18,9 @@ class TradeLog(Base):
 
     status = Column(String, default="pending") 
     is_order = Column(Boolean, default=True)
-    broker_order_id = Column(String, nullable=True)
\ No newline at end of file
+    broker_order_id = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_trade_logs_user_strategy_symbol_timestamp", "user_id", "strategy_id", "symbol", "timestamp"),
+        Index("ix_trade_logs_user_timestamp", "user_id", "timestamp", "id"),
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from datetime import datetime
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -11,15 +11,20 @@ from schemas.signal_log import SignalLogResponse, SignalLogUpdate
 from schemas.trade_log import TradeLogResponse, TradeLogUpdate
 from schemas.analytics import AnalyticsOverviewResponse, StrategyPnlItem, TopTickerItem, DailyPnlItem
 from services.analytics_service import get_overview_analytics, get_strategies_pnl, get_top_tickers, get_equity_curve
+from services.pnl_rollup import refresh_daily_pnl
+from utils.pagination import keyset_page, NEXT_CURSOR_HEADER
 
 analytics_router = APIRouter()
 
 @analytics_router.get("/analytics/trades", response_model=List[TradeLogResponse])
 def get_trades(
+    response: Response,
     strategy_id: Optional[int] = Query(None),
     ticker: Optional[str] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -32,7 +37,14 @@ def get_trades(
         query = query.filter(TradeLog.timestamp >= start_date)
     if end_date:
         query = query.filter(TradeLog.timestamp <= end_date)
-    return query.order_by(TradeLog.timestamp.desc()).all()
+
+    try:
+        trades, next_cursor = keyset_page(query, TradeLog.timestamp, TradeLog.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return trades
 
 
 @analytics_router.put("/analytics/signals/{signal_id}", response_model=SignalLogResponse)
@@ -69,6 +81,7 @@ def update_trade_log(
         trade.exit_price = update.exit_price
     if update.pnl is not None:
         trade.pnl = update.pnl
+        refresh_daily_pnl(db, trade)
 
     db.commit()
     db.refresh(trade)
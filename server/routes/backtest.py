@@ -8,9 +8,15 @@ from schemas.backtest import (
     BacktestResponse,
     BacktestMetrics,
     EquityPoint,
-    BacktestTrade
+    BacktestTrade,
+    BacktestSweepRequest,
+    BacktestSweepResponse,
+    PortfolioBacktestRequest,
+    PortfolioBacktestResponse,
+    BacktestJobResponse
 )
-from services.backtest_engine import run_backtest
+from services.backtest_engine import run_backtest_sweep, run_portfolio_backtest
+from services.backtest_jobs import submit_backtest, run_backtest_stored, get_backtest_job, cancel_backtest
 
 backtest_router = APIRouter(prefix="/backtest", tags=["Backtest"])
 
@@ -21,18 +27,94 @@ def run_backtest_endpoint(
     db: Session = Depends(get_db)
 ):
     try:
-        result = run_backtest(request, user.id, db)
-
-        metrics = BacktestMetrics(**result["metrics"])
-        equity_curve = [EquityPoint(**pt) for pt in result["equity_curve"]]
-        trades = [BacktestTrade(**t) for t in result["trades"]]
-
-        return BacktestResponse(
-            id=None,
-            metrics=metrics,
-            equity_curve=equity_curve,
-            trades=trades
-        )
+        result = run_backtest_stored(request, user.id, db)
+        return backtest_response(result["id"], result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+
+def backtest_response(result_id, result: dict) -> BacktestResponse:
+    return BacktestResponse(
+        id=result_id,
+        metrics=BacktestMetrics(**result["metrics"]),
+        equity_curve=[EquityPoint(**pt) for pt in result["equity_curve"]],
+        trades=[BacktestTrade(**t) for t in result["trades"]]
+    )
+
+
+def job_result(job) -> BacktestResponse:
+    return backtest_response(job.id, {"metrics": job.metrics, "equity_curve": job.equity_curve, "trades": job.trades})
+
+
+def job_response(job, cached: bool = False) -> BacktestJobResponse:
+    return BacktestJobResponse(
+        id=job.id,
+        status=job.status,
+        progress=job.progress,
+        cached=cached,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        result=job_result(job) if job.status == "done" else None
+    )
+
+
+@backtest_router.post("/jobs", response_model=BacktestJobResponse)
+def submit_backtest_job(
+    request: BacktestRequest,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        job, cached = submit_backtest(request, user.id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job_response(job, cached)
+
+
+@backtest_router.get("/jobs/{job_id}", response_model=BacktestJobResponse)
+def get_backtest_job_status(
+    job_id: int,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    job = get_backtest_job(job_id, user.id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job_response(job)
+
+
+@backtest_router.post("/jobs/{job_id}/cancel", response_model=BacktestJobResponse)
+def cancel_backtest_job(
+    job_id: int,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    job = cancel_backtest(job_id, user.id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job_response(job)
+
+
+@backtest_router.post("/sweep", response_model=BacktestSweepResponse)
+def run_backtest_sweep_endpoint(
+    request: BacktestSweepRequest,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        return BacktestSweepResponse(**run_backtest_sweep(request, user.id, db))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@backtest_router.post("/portfolio", response_model=PortfolioBacktestResponse)
+def run_portfolio_backtest_endpoint(
+    request: PortfolioBacktestRequest,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        return PortfolioBacktestResponse(**run_portfolio_backtest(request, user.id, db))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,7 +1,6 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc
 from database import get_db
 from datetime import datetime
 from models.strategy import Strategy
@@ -12,11 +11,13 @@ from models.signal_log import SignalLog
 from routes.auth import get_current_user
 from schemas.strategy import StrategyCreate, StrategyResponse, StrategyTickerLink, CustomStrategyResponse, TensorFlowStrategyResponse
 from services.tensorflow_trainer import train_model_for_strategy
+from ai_model.predictors.model_registry import model_registry, model_paths
+from utils.pagination import keyset_page, NEXT_CURSOR_HEADER
 
 strategy_router = APIRouter()
 
 
-from typing import Union
+from typing import Optional, Union
 
 def serialize_strategy(s: Strategy) -> Union[CustomStrategyResponse, TensorFlowStrategyResponse]:
     if s.strategy_type == "ml_tf":
@@ -178,18 +179,25 @@ def assign_tickers_to_strategy(strategy_id: int, payload: StrategyTickerLink, us
 
 
 @strategy_router.get("/strategies/{strategy_id}/logs")
-def get_strategy_logs(strategy_id: int, user: User = Depends(get_current_user), db: Session = Depends(get_db), limit: int = 20):
+def get_strategy_logs(
+    strategy_id: int,
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = None,
+):
     strategy = db.query(Strategy).filter_by(id=strategy_id, user_id=user.id).first()
     if not strategy:
         raise HTTPException(status_code=404, detail="Strategy not found")
 
-    logs = (
-        db.query(SignalLog)
-        .filter(SignalLog.strategy_id == strategy_id, SignalLog.user_id == user.id)
-        .order_by(desc(SignalLog.created_at))
-        .limit(limit)
-        .all()
-    )
+    query = db.query(SignalLog).filter(SignalLog.strategy_id == strategy_id, SignalLog.user_id == user.id)
+    try:
+        logs, next_cursor = keyset_page(query, SignalLog.created_at, SignalLog.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     return [
         {
@@ -213,6 +221,7 @@ def train_strategy_model(strategy_id: int, user: User = Depends(get_current_user
 
     try:
         train_model_for_strategy(strategy, user.id)
+        model_registry.invalidate(user.id, strategy.training_ticker)
         strategy.last_trained_at = datetime.utcnow()
         db.commit()
         return {"message": "Training completed"}
@@ -225,18 +234,12 @@ def delete_trained_model(strategy_id: int, user: User = Depends(get_current_user
     if not strategy:
         raise HTTPException(status_code=404, detail="Strategy not found")
 
-    model_dir = f"ai_model/models/tf_models"
-    paths = [
-        os.path.join(model_dir, f"{user.id}_{strategy.training_ticker}.keras"),
-        os.path.join(model_dir, f"{user.id}_{strategy.training_ticker}_scaler.pkl"),
-        os.path.join(model_dir, f"{user.id}_{strategy.training_ticker}_encoder.pkl"),
-    ]
-
     deleted = []
-    for path in paths:
+    for path in model_paths(user.id, strategy.training_ticker):
         if os.path.exists(path):
             os.remove(path)
             deleted.append(path)
+    model_registry.invalidate(user.id, strategy.training_ticker)
 
     strategy.last_trained_at = None
     db.commit()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Literal, Union
 from datetime import datetime
 
 class BacktestRequest(BaseModel):
@@ -8,6 +8,8 @@ class BacktestRequest(BaseModel):
     parameters: Optional[Dict] = {}
     start_date: datetime
     end_date: datetime
+    # Require signals to hold for the strategy's confirmation_candles bars, as live checks do
+    live_confirmation: bool = False
 
 class BacktestMetrics(BaseModel):
     total_pnl: float
@@ -31,4 +33,89 @@ class BacktestResponse(BaseModel):
     id: Optional[int] = None 
     metrics: BacktestMetrics
     equity_curve: List[EquityPoint]
-    trades: List[BacktestTrade]
\ No newline at end of file
+    trades: List[BacktestTrade]
+
+class BacktestJobResponse(BaseModel):
+    id: int
+    status: str
+    progress: float
+    cached: bool = False
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[BacktestResponse] = None
+
+class BacktestSweepRequest(BaseModel):
+    strategy_id: int
+    ticker: str
+    start_date: datetime
+    end_date: datetime
+    # e.g. {"stop_loss": [1, 2], "buy_signals.0.value": [25, 30, 35]}
+    parameters: Dict[str, List[Union[float, str, None]]]
+    rank_by: Literal["total_pnl", "win_rate", "sharpe_ratio", "max_drawdown", "average_pnl"] = "total_pnl"
+    limit: Optional[int] = 50
+    # Same flag as BacktestRequest, so a result can be reproduced with /backtest/run
+    live_confirmation: bool = False
+
+class SweepMetrics(BacktestMetrics):
+    trades: int
+
+class SweepResult(BaseModel):
+    rank: int
+    parameters: Dict[str, Union[float, str, None]]
+    metrics: SweepMetrics
+
+class BacktestSweepResponse(BaseModel):
+    combinations: int
+    live_confirmation: bool
+    results: List[SweepResult]
+
+class PortfolioBacktestRequest(BaseModel):
+    strategy_id: int
+    start_date: datetime
+    end_date: datetime
+    # Defaults to the strategy's linked tickers and its default timeframe
+    tickers: Optional[List[str]] = None
+    timeframe: Optional[str] = None
+    initial_capital: float = 10000.0
+
+class PortfolioMetrics(BaseModel):
+    initial_capital: float
+    final_equity: float
+    total_pnl: float
+    return_pct: float
+    max_drawdown: float
+    max_drawdown_pct: float
+    trades: int
+    win_rate: float
+
+class PortfolioEquityPoint(BaseModel):
+    date: datetime
+    equity: float
+    pnl: float
+
+class PortfolioTickerResult(BaseModel):
+    ticker: str
+    bars: int
+    trades: int
+    skipped_entries: int
+    total_pnl: float
+    win_rate: float
+    open_position: Optional[str] = None
+
+class PortfolioTrade(BaseModel):
+    ticker: str
+    side: str
+    qty: float
+    entry_time: datetime
+    entry_price: float
+    exit_time: Optional[datetime] = None
+    exit_price: Optional[float] = None
+    result: str
+    pnl: float
+
+class PortfolioBacktestResponse(BaseModel):
+    metrics: PortfolioMetrics
+    equity_curve: List[PortfolioEquityPoint]
+    tickers: List[PortfolioTickerResult]
+    trades: List[PortfolioTrade]
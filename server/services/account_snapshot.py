@@ -0,0 +1,78 @@
+import threading
+from models.broker import UserBroker
+from services.alpaca_service import get_positions, check_account
+
+# Quantities from notional / price leave float residue; a smaller remainder is a closed position
+QTY_EPSILON = 1e-9
+
+
+class AccountSnapshot:
+    """
+    Tick-scoped view of broker positions and cash: each broker is listed once per scheduler pass,
+    and orders placed during the pass are applied locally so later checks see them.
+    """
+
+    def __init__(self):
+        self._positions = {}
+        self._accounts = {}
+        self._broker_locks = {}
+        self._lock = threading.Lock()
+
+    def _broker_lock(self, broker: UserBroker) -> threading.Lock:
+        with self._lock:
+            return self._broker_locks.setdefault(broker.id, threading.Lock())
+
+    def _positions_for(self, broker: UserBroker) -> dict:
+        with self._broker_lock(broker):
+            if broker.id not in self._positions:
+                self._positions[broker.id] = {p["symbol"]: p for p in get_positions(broker)}
+            return self._positions[broker.id]
+
+    def get_positions(self, broker: UserBroker) -> list[dict]:
+        return list(self._positions_for(broker).values())
+
+    def get_position(self, broker: UserBroker, symbol: str):
+        return self._positions_for(broker).get(symbol)
+
+    def get_account(self, broker: UserBroker) -> dict:
+        with self._broker_lock(broker):
+            if broker.id not in self._accounts:
+                account = check_account(broker)
+                self._accounts[broker.id] = {"cash": float(account["cash"]), "status": account["status"]}
+            return dict(self._accounts[broker.id])
+
+    def apply_fill(self, broker: UserBroker, symbol: str, side: str, price: float, qty: float = None, notional: float = None):
+        """Reflect an order placed during this pass, assuming it filled at `price`."""
+        if not price:
+            return
+        if qty is None:
+            qty = (notional or 0) / price
+        signed_qty = qty if side == "buy" else -qty
+
+        positions = self._positions_for(broker)
+        with self._broker_lock(broker):
+            current = positions.get(symbol)
+            if current is None:
+                positions[symbol] = {
+                    "symbol": symbol,
+                    "qty": signed_qty,
+                    "avg_entry_price": price,
+                    "current_price": price,
+                    "market_value": signed_qty * price,
+                    "unrealized_pl": 0.0,
+                    "unrealized_plpc": 0.0,
+                }
+            else:
+                new_qty = current["qty"] + signed_qty
+                if abs(new_qty) < QTY_EPSILON:
+                    del positions[symbol]
+                else:
+                    if (current["qty"] > 0) == (signed_qty > 0):
+                        current["avg_entry_price"] = (current["avg_entry_price"] * current["qty"] + price * signed_qty) / new_qty
+                    elif (new_qty > 0) != (current["qty"] > 0):
+                        current["avg_entry_price"] = price
+                    current["qty"] = new_qty
+                    current["market_value"] = new_qty * price
+
+            if broker.id in self._accounts:
+                self._accounts[broker.id]["cash"] -= signed_qty * price
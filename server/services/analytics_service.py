@@ -1,11 +1,11 @@
 from sqlalchemy.orm import Session
 from models.trade_log import TradeLog
+from models.daily_pnl import DailyPnl
 from models.strategy import Strategy
 from models.user import User
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
 from datetime import datetime
 from typing import Optional
-import numpy as np
 
 def get_overview_analytics(
     db: Session,
@@ -15,60 +15,90 @@ def get_overview_analytics(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None
 ):
-    query = db.query(TradeLog).filter(TradeLog.user_id == user.id)
-
+    """
+    Overview metrics computed in one SQL statement: the cumulative PnL and its running peak come from
+    window functions, so only a single aggregate row is loaded whatever the size of the trade history.
+    """
+    filters = [TradeLog.user_id == user.id]
     if strategy_id:
-        query = query.filter(TradeLog.strategy_id == strategy_id)
+        filters.append(TradeLog.strategy_id == strategy_id)
     if ticker:
-        query = query.filter(TradeLog.symbol == ticker)
+        filters.append(TradeLog.symbol == ticker)
     if start_date:
-        query = query.filter(TradeLog.timestamp >= start_date)
+        filters.append(TradeLog.timestamp >= start_date)
     if end_date:
-        query = query.filter(TradeLog.timestamp <= end_date)
-
-    trades = query.all()
+        filters.append(TradeLog.timestamp <= end_date)
+
+    order = (TradeLog.timestamp, TradeLog.id)
+    curve = (
+        select(
+            TradeLog.is_order,
+            TradeLog.pnl,
+            TradeLog.timestamp,
+            TradeLog.id,
+            func.sum(TradeLog.pnl).over(order_by=order).label("cumulative"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    peaks = select(
+        curve,
+        func.max(curve.c.cumulative).over(order_by=(curve.c.timestamp, curve.c.id)).label("peak"),
+    ).subquery()
+
+    row = db.execute(
+        select(
+            func.count().filter(peaks.c.is_order.isnot(True)).label("total_trades"),
+            func.count().filter(peaks.c.is_order.is_(True)).label("total_orders"),
+            func.count().filter(peaks.c.pnl > 0).label("success_trades"),
+            func.count(peaks.c.pnl).label("pnl_count"),
+            func.coalesce(func.sum(peaks.c.pnl), 0.0).label("total_pnl"),
+            func.avg(peaks.c.pnl).label("mean_pnl"),
+            func.stddev_pop(peaks.c.pnl).label("std_pnl"),
+            # Drawdown from the highest cumulative PnL so far, the curve starting at 0
+            func.coalesce(func.max(func.greatest(peaks.c.peak, 0.0) - peaks.c.cumulative), 0.0).label("max_drawdown"),
+        )
+    ).one()
 
-    total_trades = len([t for t in trades if not t.is_order])
-    total_orders = len([t for t in trades if t.is_order])
-    success_trades = len([t for t in trades if t.pnl and t.pnl > 0])
-    win_rate = (success_trades / total_trades) * 100 if total_trades > 0 else 0
-    total_pnl = sum(t.pnl for t in trades if t.pnl)
+    total_trades = row.total_trades
+    win_rate = (row.success_trades / total_trades) * 100 if total_trades > 0 else 0
+    total_pnl = float(row.total_pnl)
     average_pnl = total_pnl / total_trades if total_trades > 0 else 0
 
-    pnl_curve = []
-    pnl_series = []
-    cumulative = 0
-    for t in sorted(trades, key=lambda x: x.timestamp):
-        if t.pnl is not None:
-            cumulative += t.pnl
-            pnl_curve.append(cumulative)
-            pnl_series.append(t.pnl)
-
-    peak = max_drawdown = 0
-    for x in pnl_curve:
-        if x > peak:
-            peak = x
-        drawdown = peak - x
-        max_drawdown = max(max_drawdown, drawdown)
-
     sharpe_ratio = 0.0
-    if len(pnl_series) >= 2:
-        mean_return = np.mean(pnl_series)
-        std_dev = np.std(pnl_series)
-        if std_dev != 0:
-            sharpe_ratio = mean_return / std_dev
+    if row.pnl_count >= 2 and row.std_pnl:
+        sharpe_ratio = float(row.mean_pnl) / float(row.std_pnl)
 
     return {
         "total_trades": total_trades,
-        "total_orders": total_orders,
-        "success_trades": success_trades,
+        "total_orders": row.total_orders,
+        "success_trades": row.success_trades,
         "win_rate": round(win_rate, 2),
         "total_pnl": round(total_pnl, 2),
         "average_pnl": round(average_pnl, 2),
-        "max_drawdown": round(max_drawdown, 2),
+        "max_drawdown": round(float(row.max_drawdown), 2),
         "sharpe_ratio": round(sharpe_ratio, 2)
     }
 
+def _rollup_filters(
+    user: User,
+    strategy_id: Optional[int] = None,
+    ticker: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> list:
+    """Filters on the daily rollup; date bounds apply to whole days."""
+    filters = [DailyPnl.user_id == user.id]
+    if strategy_id:
+        filters.append(DailyPnl.strategy_id == strategy_id)
+    if ticker:
+        filters.append(DailyPnl.symbol == ticker)
+    if start_date:
+        filters.append(DailyPnl.day >= start_date.date())
+    if end_date:
+        filters.append(DailyPnl.day <= end_date.date())
+    return filters
+
 def get_strategies_pnl(
     db: Session,
     user: User,
@@ -77,31 +107,18 @@ def get_strategies_pnl(
     start_date: datetime = None,
     end_date: datetime = None
 ):
-    query = (
+    results = (
         db.query(
-            TradeLog.strategy_id,
+            DailyPnl.strategy_id,
             Strategy.title,
-            func.sum(TradeLog.pnl).label("total_pnl")
-        )
-        .join(Strategy, Strategy.id == TradeLog.strategy_id)
-        .filter(
-            TradeLog.user_id == user.id,
-            TradeLog.is_order == False,
-            TradeLog.pnl.isnot(None)
+            func.sum(DailyPnl.pnl).label("total_pnl")
         )
+        .join(Strategy, Strategy.id == DailyPnl.strategy_id)
+        .filter(*_rollup_filters(user, strategy_id, ticker, start_date, end_date))
+        .group_by(DailyPnl.strategy_id, Strategy.title)
+        .all()
     )
 
-    if strategy_id:
-        query = query.filter(TradeLog.strategy_id == strategy_id)
-    if ticker:
-        query = query.filter(TradeLog.symbol == ticker)
-    if start_date:
-        query = query.filter(TradeLog.timestamp >= start_date)
-    if end_date:
-        query = query.filter(TradeLog.timestamp <= end_date)
-
-    results = query.group_by(TradeLog.strategy_id, Strategy.title).all()
-
     return [
         {
             "strategy_id": row.strategy_id,
@@ -120,29 +137,13 @@ def get_top_tickers(
     start_date: datetime = None,
     end_date: datetime = None
 ):
-    query = (
+    results = (
         db.query(
-            TradeLog.symbol,
-            func.sum(TradeLog.pnl).label("total_pnl")
+            DailyPnl.symbol,
+            func.sum(DailyPnl.pnl).label("total_pnl")
         )
-        .filter(
-            TradeLog.user_id == user.id,
-            TradeLog.is_order == False,
-            TradeLog.pnl.isnot(None)
-        )
-    )
-
-    if strategy_id:
-        query = query.filter(TradeLog.strategy_id == strategy_id)
-    if ticker:
-        query = query.filter(TradeLog.symbol == ticker)
-    if start_date:
-        query = query.filter(TradeLog.timestamp >= start_date)
-    if end_date:
-        query = query.filter(TradeLog.timestamp <= end_date)
-
-    results = (
-        query.group_by(TradeLog.symbol)
+        .filter(*_rollup_filters(user, strategy_id, ticker, start_date, end_date))
+        .group_by(DailyPnl.symbol)
         .order_by(desc("total_pnl"))
         .limit(limit)
         .all()
@@ -164,32 +165,19 @@ def get_equity_curve(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None
 ):
-    query = db.query(TradeLog).filter(
-        TradeLog.user_id == user.id,
-        TradeLog.is_order == False,
-        TradeLog.pnl.isnot(None)
+    daily_pnl = func.sum(DailyPnl.pnl)
+    results = (
+        db.query(
+            DailyPnl.day,
+            func.sum(daily_pnl).over(order_by=DailyPnl.day).label("cumulative")
+        )
+        .filter(*_rollup_filters(user, strategy_id, ticker, start_date, end_date))
+        .group_by(DailyPnl.day)
+        .order_by(DailyPnl.day)
+        .all()
     )
 
-    if strategy_id:
-        query = query.filter(TradeLog.strategy_id == strategy_id)
-    if ticker:
-        query = query.filter(TradeLog.symbol == ticker)
-    if start_date:
-        query = query.filter(TradeLog.timestamp >= start_date)
-    if end_date:
-        query = query.filter(TradeLog.timestamp <= end_date)
-
-    trades = query.order_by(TradeLog.timestamp.asc()).all()
-
-    cumulative = 0
-    daily_pnls = {}
-
-    for t in trades:
-        date_key = t.timestamp.date()
-        cumulative += t.pnl
-        daily_pnls[date_key] = cumulative
-
     return [
-        {"date": date, "pnl": pnl}
-        for date, pnl in sorted(daily_pnls.items())
-    ]
\ No newline at end of file
+        {"date": row.day, "pnl": row.cumulative}
+        for row in results
+    ]
@@ -1,33 +1,32 @@
 from database import SessionLocal
-from datetime import datetime, timedelta
+from datetime import datetime
 from models.strategy import Strategy
 from models.signal_log import SignalLog
 from models.trade_log import TradeLog
 from models.strategy_ticker import StrategyTicker
 from services.strategy_service import StrategyService
-from data.automation_data import fetch_intraday_alpaca
+from data.bar_cache import BarCache
 from data.alpaca_data import fetch_history_alpaca
-from services.alpaca_service import place_order, check_account, get_positions
+from services.alpaca_service import place_order
+from services.account_snapshot import AccountSnapshot
+from services.log_writer import LogWriter
+from services.execution_plan import ExecutionPlan, UserPlan, load_execution_plan
+from utils.indicators import rule_indicator_columns
+from utils.online_indicators import online_indicators
 from services.email_service import send_signal_notification, send_order_filled_notification, send_error_notification
-from models.user_preferences import UserPreferences
 from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import json
-from services.tf_strategy_service import run_tf_strategy_for_ticker
+import os
+from services.tf_strategy_service import run_tf_strategy_for_ticker, ML_WINDOW_DAYS
+
+STRATEGY_WORKERS = int(os.getenv("STRATEGY_WORKERS", 8))
+INTRADAY_WINDOW_DAYS = 7
 
 def get_debug_hash(data: dict) -> str:
     return hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
 
-def parse_check_frequency(freq: str) -> timedelta:
-    mapping = {
-        "1 Minute": timedelta(minutes=1),
-        "5 Minutes": timedelta(minutes=5),
-        "15 Minutes": timedelta(minutes=15),
-        "1 Hour": timedelta(hours=1),
-        "1 Day": timedelta(days=1),
-    }
-    return mapping.get(freq, timedelta(hours=1))
-
 def get_tp_sl_prices(price, action, strategy):
     tp = None
     sl = None
@@ -50,7 +49,11 @@ def get_tp_sl_prices(price, action, strategy):
 
 
 
-def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
+def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session, bars: BarCache = None, snapshot: AccountSnapshot = None, logs: LogWriter = None):
+    if logs is None:
+        with LogWriter(db) as logs:
+            return run_strategy_for_ticker(strategy, ticker, user, db, bars=bars, snapshot=snapshot, logs=logs)
+
     print(f"Strategy '{strategy.title}' checking {ticker}...")
 
     broker = next((b for b in user.brokers if b.is_connected), None)
@@ -59,18 +62,25 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
         return
 
 
+    if bars is None:
+        bars = BarCache()
+    if snapshot is None:
+        snapshot = AccountSnapshot()
+
     # df = fetch_history_alpaca(symbol=ticker, start=start, end=end, timeframe=strategy.default_timeframe)
-    df = fetch_intraday_alpaca(symbol=ticker, timeframe=strategy.default_timeframe)
+    df = bars.get(ticker, strategy.default_timeframe, days=INTRADAY_WINDOW_DAYS)
     if df is None or df.empty:
         print(f"No data for {ticker}")
         return
 
-    result = StrategyService.apply_saved_strategy(df, strategy.id, db)
-    if result is None or result.empty:
+    # Only the bars since the previous check are fed to the per-series indicator state
+    columns = rule_indicator_columns(strategy.buy_signals + strategy.sell_signals)
+    window = online_indicators.update(ticker, strategy.default_timeframe, df, columns, rows=strategy.confirmation_candles or 1)
+    recent = StrategyService.apply_signals(window, strategy)
+    if recent is None or recent.empty:
         print(f"Strategy returned empty for {ticker}")
         return
 
-    recent = result.tail(strategy.confirmation_candles or 1)
     buy_confirmed = all(row.get("Buy_Signal") for _, row in recent.iterrows())
     sell_confirmed = all(row.get("Sell_Signal") for _, row in recent.iterrows())
     action = "buy" if buy_confirmed else "sell" if sell_confirmed else None
@@ -93,8 +103,7 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
         print(f"Duplicate signal for {ticker} skipped.")
         return
     
-    positions = get_positions(broker)
-    existing_position = next((p for p in positions if p["symbol"] == ticker), None)
+    existing_position = snapshot.get_position(broker, ticker)
 
     if existing_position:
         position_qty = float(existing_position["qty"])
@@ -113,8 +122,7 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
                 executed=True,
                 result="ignored: same direction"
             )
-            db.add(hold_signal)
-            db.commit()
+            logs.add(hold_signal)
             return
 
     new_signal = SignalLog(
@@ -126,10 +134,9 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
         debug_data=debug_data,
         executed=False
     )
-    db.add(new_signal)
-    db.commit()
+    logs.add(new_signal)
 
-    prefs = db.query(UserPreferences).filter_by(user_id=user.id).first()
+    prefs = user.preferences
     if prefs and prefs.email_alerts_enabled and prefs.notify_on_signal:
         try:
             send_signal_notification(user.email, ticker, action, price)
@@ -139,7 +146,7 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
     qty = None
     notional = None
     if strategy.use_balance_percent:
-        account = check_account(broker)
+        account = snapshot.get_account(broker)
         cash = float(account["cash"])
         amount = cash * (strategy.trade_amount / 100)
     else:
@@ -160,8 +167,7 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
         is_order=True,
         status="pending"
     )
-    db.add(trade)
-    db.commit()
+    logs.add(trade)
 
     print(f"📈 {action.upper()} signal for {ticker} at ${price:.2f} | Qty: {qty} | Notional: ${notional}")
 
@@ -172,36 +178,31 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
         if notional:
             if order_type != "market":
                 print("Notional only valid with market orders")
-                trade.status = "rejected"
-                new_signal.result = "failed: notional invalid with non-market"
-                db.commit()
+                logs.update(trade, status="rejected")
+                logs.update(new_signal, result="failed: notional invalid with non-market")
                 return
             time_in_force = "day"
 
         # 🛡 Защита: нельзя использовать SL/TP при notional или percent
         if (strategy.take_profit or strategy.stop_loss) and (strategy.use_notional or strategy.use_balance_percent):
             print("TP/SL поддерживаются только при использовании фиксированного qty")
-            trade.status = "rejected"
-            new_signal.result = "failed: TP/SL not allowed with notional or balance percent"
-            db.commit()
+            logs.update(trade, status="rejected")
+            logs.update(new_signal, result="failed: TP/SL not allowed with notional or balance percent")
             return
 
         if action == "sell" and (strategy.use_notional or strategy.use_balance_percent):
             print("Short with notional or balance % запрещен")
-            trade.status = "rejected"
-            new_signal.result = "failed: short not allowed with notional or percent"
-            db.commit()
+            logs.update(trade, status="rejected")
+            logs.update(new_signal, result="failed: short not allowed with notional or percent")
             return
 
         if action == "sell" and qty is not None and not qty.is_integer():
-            positions = get_positions(broker)
-            current = next((p for p in positions if p["symbol"] == ticker), None)
+            current = snapshot.get_position(broker, ticker)
             has_long_position = current and float(current["qty"]) >= qty
             if not has_long_position:
                 print(f"❌ Cannot short fractional shares for {ticker}: qty={qty}")
-                trade.status = "rejected"
-                new_signal.result = "failed: fractional short not allowed"
-                db.commit()
+                logs.update(trade, status="rejected")
+                logs.update(new_signal, result="failed: fractional short not allowed")
                 return
 
         take_profit, stop_loss = get_tp_sl_prices(price, action, strategy)
@@ -209,9 +210,8 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
 
         if order_class == "bracket" and qty is not None and not qty.is_integer():
             print(f"Bracket-ордера не поддерживают fractional qty: {qty}")
-            trade.status = "rejected"
-            new_signal.result = "failed: fractional qty not allowed for bracket"
-            db.commit()
+            logs.update(trade, status="rejected")
+            logs.update(new_signal, result="failed: fractional qty not allowed for bracket")
             return
 
         order_kwargs = {
@@ -229,15 +229,14 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
 
         clean_order_kwargs = {k: v for k, v in order_kwargs.items() if v is not None}
 
+        # The signal and the pending trade must be stored before the broker sees the order
+        logs.flush()
         try:
             order = place_order(**clean_order_kwargs)
+            snapshot.apply_fill(broker, ticker, action, price, qty=qty, notional=notional)
 
-            trade.status = "matched"
-            trade.is_order = False
-            trade.broker_order_id = getattr(order, "id", None)
-            new_signal.executed = True
-            new_signal.result = "matched"
-            db.commit()
+            logs.update(trade, status="matched", is_order=False, broker_order_id=getattr(order, "id", None))
+            logs.update(new_signal, executed=True, result="matched")
 
             print(f"Order placed: {action.upper()} {ticker}")
 
@@ -246,39 +245,80 @@ def run_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
 
         except Exception as e:
             error_msg = str(e)
-            trade.status = "rejected"
-            new_signal.result = f"failed: {error_msg}"
-            db.commit()
+            logs.update(trade, status="rejected")
+            logs.update(new_signal, result=f"failed: {error_msg}")
 
             print(f"Order failed: {error_msg}")
             if prefs and prefs.email_alerts_enabled and prefs.notify_on_error:
                 send_error_notification(user.email, error_msg)
 
+def run_user_jobs(plan: UserPlan, bars: BarCache, snapshot: AccountSnapshot):
+    """
+    Run all (strategy, ticker) checks of one user in order, on a dedicated session.
+    Users are processed in parallel, but a user's orders are never placed concurrently.
+    """
+    db = SessionLocal()
+    logs = LogWriter(db)
+    try:
+        for strategy, ticker in plan.jobs:
+            mark = logs.mark()
+            try:
+                if strategy.strategy_type == "ml_tf":
+                    run_tf_strategy_for_ticker(strategy, ticker, plan.user, db, bars=bars, snapshot=snapshot, logs=logs)
+                else:
+                    run_strategy_for_ticker(strategy, ticker, plan.user, db, bars=bars, snapshot=snapshot, logs=logs)
+            except Exception as e:
+                logs.discard(mark)
+                db.rollback()
+                print(f"Strategy '{strategy.title}' failed on {ticker}: {e}")
+
+        # Logs of the whole pass are written in one transaction
+        try:
+            logs.flush()
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to write strategy logs of user {plan.user.id}: {e}")
+    finally:
+        db.close()
+
+def mark_checked(plan: ExecutionPlan):
+    if not plan.strategies:
+        return
+    db = SessionLocal()
+    try:
+        db.query(Strategy).filter(Strategy.id.in_([s.id for s in plan.strategies])).update(
+            {"last_checked": plan.now}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
 def check_and_run_strategies():
     print("Running strategy engine...")
-    db = SessionLocal()
     now = datetime.utcnow()
+    bars = BarCache(now=now)
+    snapshot = AccountSnapshot()
 
-    try:
-        strategies = db.query(Strategy).filter(Strategy.is_enabled == True).all()
+    plan = load_execution_plan(now)
 
-        for strategy in strategies:
-            interval = parse_check_frequency(strategy.market_check_frequency)
-            if strategy.last_checked and (now - strategy.last_checked) < interval:
-                print(f"Skipping '{strategy.title}' (too early)")
-                continue
+    series = []
+    for user_plan in plan.users:
+        for strategy, ticker in user_plan.jobs:
+            window = ML_WINDOW_DAYS if strategy.strategy_type == "ml_tf" else INTRADAY_WINDOW_DAYS
+            series.append((ticker, strategy.default_timeframe, window))
 
-            user = strategy.user
-            for link in strategy.tickers:
-                ticker = link.user_stock.ticker
+    if series:
+        try:
+            bars.prefetch(series)
+        except Exception as e:
+            print(f"Batched bar prefetch failed, falling back to per-ticker fetches: {e}")
 
-                if strategy.strategy_type == "ml_tf":
-                    run_tf_strategy_for_ticker(strategy, ticker, user, db)
-                else:
-                    run_strategy_for_ticker(strategy, ticker, user, db)
+    if plan.users:
+        with ThreadPoolExecutor(max_workers=STRATEGY_WORKERS, thread_name_prefix="strategy") as pool:
+            futures = [pool.submit(run_user_jobs, user_plan, bars, snapshot) for user_plan in plan.users]
+            for future in futures:
+                future.result()
 
-            strategy.last_checked = now
-            db.commit()
+    mark_checked(plan)
 
-    finally:
-        db.close()
\ No newline at end of file
+    print(f"Strategy engine finished: {len(series)} checks in {(datetime.utcnow() - now).total_seconds():.1f}s, bars: {bars.stats()}")
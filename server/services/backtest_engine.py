@@ -1,37 +1,93 @@
 from datetime import datetime
 from models import Strategy
 from schemas import BacktestRequest
+from schemas.backtest import BacktestSweepRequest, PortfolioBacktestRequest
 from sqlalchemy.orm import Session
-from data.alpaca_data import fetch_history_alpaca
+from data.alpaca_data import fetch_history_alpaca, fetch_history_batch_alpaca
 from ai_model.predictors.predict_signals_batch import predict_signals_batch
-from utils.simulate_rule_strategy import simulate_rule_strategy
+from utils.simulate_rule_strategy import simulate_rule_strategy, rule_signals
+from utils.simulate_portfolio import simulate_portfolio, TickerSeries
 from utils.simulate_ai_strategy import simulate_ai_strategy
+from utils.backtest_sweep import run_sweep
 from utils.calculate_metrics import calculate_metrics, calculate_equity_curve
+from utils.backtest_run import BacktestRun, EXIT_OPEN, EXIT_SIGNAL, EXIT_RESULTS
+from concurrent.futures import ThreadPoolExecutor
+import os
+import numpy as np
 import pandas as pd
 
-def run_backtest(request: BacktestRequest, user_id: int, db: Session):
+PORTFOLIO_WORKERS = int(os.getenv("PORTFOLIO_WORKERS", 8))
+BACKTEST_TIMEFRAME = "1Hour"
+
+
+def _isoformat(index: pd.DatetimeIndex) -> list[str]:
+    """Timestamp.isoformat() of every bar; vectorized for naive/UTC indexes on whole seconds (all bar data)."""
+    naive_or_utc = index.tz is None or str(index.tz) == "UTC"
+    if not naive_or_utc or (index.asi8 % 1_000_000_000).any():
+        return [ts.isoformat() for ts in index]
+    values = index.tz_localize(None) if index.tz is not None else index
+    dates = np.datetime_as_string(values.to_numpy(dtype="datetime64[s]"), unit="s")
+    if index.tz is not None:
+        dates = np.char.add(dates, "+00:00")
+    return dates.tolist()
+
+
+def serialize_run(run: BacktestRun) -> tuple[list[dict], list[dict], str | None, float | None]:
+    """Trade log, equity curve and final position of a run, in the response format."""
+    index, close = run.index, run.close
+    trades_log = []
+    for entry, exit_bar, side, reason, pnl in zip(run.entry.tolist(), run.exit.tolist(), run.side.tolist(), run.reason.tolist(), run.pnl.tolist()):
+        trades_log.append({"action": "buy" if side == 1 else "sell", "price": round(close[entry], 2), "result": "opened", "pnl": 0, "time": index[entry]})
+        if reason == EXIT_OPEN:
+            continue
+        action = "exit" if reason != EXIT_SIGNAL else ("sell" if side == 1 else "buy")
+        trades_log.append({"action": action, "price": round(close[exit_bar], 2), "result": EXIT_RESULTS[reason], "pnl": round(pnl, 4), "time": index[exit_bar]})
+
+    equity_curve = [
+        {"date": date, "pnl": round(pnl, 4)}
+        for date, pnl in zip(_isoformat(index), run.equity.tolist())
+    ]
+
+    position = entry_price = None
+    if len(run.reason) and run.reason[-1] == EXIT_OPEN:
+        position = "long" if run.side[-1] == 1 else "short"
+        entry_price = close[run.entry[-1]]
+
+    return trades_log, equity_curve, position, entry_price
+
+
+def run_backtest(request: BacktestRequest, user_id: int, db: Session, progress=None):
+    """`progress(fraction)`, if given, is called as the backtest advances; it may raise to abort the run."""
+    report = progress or (lambda fraction: None)
+
     strategy = db.query(Strategy).filter_by(id=request.strategy_id, user_id=user_id).first()
     if not strategy:
         raise ValueError("Strategy not found")
 
+    report(0.0)
     df = fetch_history_alpaca(
         symbol=request.ticker,
         start=request.start_date,
         end=request.end_date,
-        timeframe="1Hour"
+        timeframe=BACKTEST_TIMEFRAME
     )
 
     if df is None or df.empty:
         raise ValueError("Historical data is empty or not available for the specified ticker and date range")
 
+    report(0.1)
     if strategy.strategy_type == "ml_tf":
-        trades_log, equity_curve, position, entry_price = simulate_ai_strategy(
+        run = simulate_ai_strategy(
             ticker=request.ticker,
             user_id=user_id,
-            df=df
+            df=df,
+            progress=lambda fraction: report(0.1 + 0.8 * fraction)
         )
     else:
-        trades_log, equity_curve, position, entry_price = simulate_rule_strategy(strategy, df)
+        run = simulate_rule_strategy(strategy, df, confirm=request.live_confirmation)
+    report(0.9)
+
+    trades_log, equity_curve, position, entry_price = serialize_run(run)
 
     
     metrics = calculate_metrics(trades_log, equity_curve)
@@ -49,3 +105,125 @@ def run_backtest(request: BacktestRequest, user_id: int, db: Session):
             } for t in trades_log
         ]
     }
+
+
+def run_backtest_sweep(request: BacktestSweepRequest, user_id: int, db: Session):
+    strategy = db.query(Strategy).filter_by(id=request.strategy_id, user_id=user_id).first()
+    if not strategy:
+        raise ValueError("Strategy not found")
+    if strategy.strategy_type == "ml_tf":
+        raise ValueError("Parameter sweeps are only supported for rule strategies")
+
+    df = fetch_history_alpaca(
+        symbol=request.ticker,
+        start=request.start_date,
+        end=request.end_date,
+        timeframe=BACKTEST_TIMEFRAME
+    )
+
+    if df is None or df.empty:
+        raise ValueError("Historical data is empty or not available for the specified ticker and date range")
+
+    return run_sweep(strategy, df, request.parameters, rank_by=request.rank_by, limit=request.limit, live_confirmation=request.live_confirmation)
+
+
+def load_portfolio_bars(tickers: list[str], start: datetime, end: datetime, timeframe: str) -> dict[str, pd.DataFrame]:
+    """Bars of all tickers: one batched request for what the store is missing, per-ticker requests in parallel as fallback."""
+    try:
+        return fetch_history_batch_alpaca(tickers, start, end, timeframe)
+    except Exception as e:
+        print(f"Batched portfolio bar fetch failed, falling back to per-ticker fetches: {e}")
+
+    with ThreadPoolExecutor(max_workers=PORTFOLIO_WORKERS, thread_name_prefix="portfolio-bars") as pool:
+        frames = pool.map(lambda ticker: fetch_history_alpaca(ticker, start, end, timeframe), tickers)
+        return dict(zip(tickers, frames))
+
+
+def run_portfolio_backtest(request: PortfolioBacktestRequest, user_id: int, db: Session):
+    strategy = db.query(Strategy).filter_by(id=request.strategy_id, user_id=user_id).first()
+    if not strategy:
+        raise ValueError("Strategy not found")
+    if strategy.strategy_type == "ml_tf":
+        raise ValueError("Portfolio backtests are only supported for rule strategies")
+    if request.initial_capital <= 0:
+        raise ValueError("Initial capital must be positive")
+
+    tickers = request.tickers or [link.user_stock.ticker for link in strategy.tickers]
+    tickers = sorted({ticker.upper() for ticker in tickers})
+    if not tickers:
+        raise ValueError("Strategy has no linked tickers")
+
+    timeframe = request.timeframe or strategy.default_timeframe
+    frames = load_portfolio_bars(tickers, request.start_date, request.end_date, timeframe)
+    loaded = [ticker for ticker in tickers if frames.get(ticker) is not None and not frames[ticker].empty]
+    if not loaded:
+        raise ValueError("Historical data is empty or not available for the strategy tickers and date range")
+
+    def prepare(ticker):
+        return TickerSeries(ticker, *rule_signals(strategy, frames[ticker], confirm=True))
+
+    with ThreadPoolExecutor(max_workers=PORTFOLIO_WORKERS, thread_name_prefix="portfolio-signals") as pool:
+        series = list(pool.map(prepare, loaded))
+
+    result = simulate_portfolio(strategy, series, request.initial_capital)
+    return serialize_portfolio(result, tickers, series, request.initial_capital)
+
+
+def serialize_portfolio(result: dict, tickers: list[str], series: list[TickerSeries], initial_capital: float) -> dict:
+    by_ticker = {s.ticker: s for s in series}
+    equity = result["equity"]
+
+    trades = []
+    for trade in result["trades"]:
+        s = by_ticker[trade["ticker"]]
+        closed = trade["exit"] is not None
+        trades.append({
+            "ticker": trade["ticker"],
+            "side": "long" if trade["side"] == 1 else "short",
+            "qty": round(trade["qty"], 6),
+            "entry_time": s.index[trade["entry"]],
+            "entry_price": round(trade["entry_price"], 2),
+            "exit_time": s.index[trade["exit"]] if closed else None,
+            "exit_price": round(trade["exit_price"], 2) if closed else None,
+            "result": EXIT_RESULTS[trade["reason"]] if closed else "open",
+            "pnl": round(trade["pnl"], 2),
+        })
+
+    breakdown = []
+    for ticker in tickers:
+        ticker_trades = [t for t in result["trades"] if t["ticker"] == ticker]
+        closed_pnls = [t["pnl"] for t in ticker_trades if t["exit"] is not None]
+        open_trade = next((t for t in ticker_trades if t["exit"] is None), None)
+        breakdown.append({
+            "ticker": ticker,
+            "bars": len(by_ticker[ticker].close) if ticker in by_ticker else 0,
+            "trades": len(closed_pnls),
+            "skipped_entries": result["skipped"].get(ticker, 0),
+            "total_pnl": round(sum(closed_pnls), 2),
+            "win_rate": round(float(np.mean(np.array(closed_pnls) > 0) * 100), 2) if closed_pnls else 0,
+            "open_position": ("long" if open_trade["side"] == 1 else "short") if open_trade else None,
+        })
+
+    closed_pnls = [t["pnl"] for t in result["trades"] if t["exit"] is not None]
+    peak = np.maximum.accumulate(np.maximum(equity, initial_capital)) if len(equity) else equity
+    drawdown = peak - equity
+    worst = int(drawdown.argmax()) if len(equity) else 0
+    final_equity = float(equity[-1]) if len(equity) else initial_capital
+
+    metrics = {
+        "initial_capital": initial_capital,
+        "final_equity": round(final_equity, 2),
+        "total_pnl": round(final_equity - initial_capital, 2),
+        "return_pct": round((final_equity - initial_capital) / initial_capital * 100, 2),
+        "max_drawdown": round(float(drawdown[worst]), 2) if len(equity) else 0,
+        "max_drawdown_pct": round(float(drawdown[worst] / peak[worst] * 100), 2) if len(equity) else 0,
+        "trades": len(closed_pnls),
+        "win_rate": round(float(np.mean(np.array(closed_pnls) > 0) * 100), 2) if closed_pnls else 0,
+    }
+
+    equity_curve = [
+        {"date": date, "equity": round(value, 2), "pnl": round(value - initial_capital, 2)}
+        for date, value in zip(_isoformat(result["timeline"]), equity.tolist())
+    ]
+
+    return {"metrics": metrics, "equity_curve": equity_curve, "tickers": breakdown, "trades": trades}
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from data.bar_store import to_utc_naive
+from models import Strategy
+from models.backtest_result import BacktestResult
+from schemas import BacktestRequest
+from services.backtest_engine import run_backtest, BACKTEST_TIMEFRAME
+
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", 2))
+# Minimum seconds between progress writes of a running job
+PROGRESS_INTERVAL = 1.0
+# Seconds between heartbeats of the jobs a process owns; a job without one for
+# HEARTBEAT_TIMEOUT seconds belongs to a dead process
+HEARTBEAT_INTERVAL = int(os.getenv("BACKTEST_HEARTBEAT_INTERVAL", 30))
+HEARTBEAT_TIMEOUT = HEARTBEAT_INTERVAL * 4
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Identifies this process as the owner of the jobs it queues
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor = ThreadPoolExecutor(max_workers=BACKTEST_WORKERS, thread_name_prefix="backtest")
+_owned_jobs = set()
+_owned_lock = threading.Lock()
+_heartbeat_thread = None
+
+
+class BacktestCancelled(Exception):
+    pass
+
+
+def _interrupted() -> dict:
+    return {"status": "failed", "error": "Interrupted: the worker running the job stopped", "finished_at": datetime.utcnow()}
+
+
+def strategy_version(strategy: Strategy, live_confirmation: bool = False) -> str:
+    """Hash of everything a backtest result depends on; unlike updated_at it ignores last_checked and similar bookkeeping."""
+    fields = {
+        "strategy_type": strategy.strategy_type,
+        "buy_signals": strategy.buy_signals,
+        "sell_signals": strategy.sell_signals,
+        "signal_logic": strategy.signal_logic,
+        "confirmation_candles": strategy.confirmation_candles,
+        "stop_loss": strategy.stop_loss,
+        "take_profit": strategy.take_profit,
+        "last_trained_at": strategy.last_trained_at.isoformat() if strategy.last_trained_at else None,
+    }
+    # Only added when set, so results stored before the flag existed keep their version
+    if live_confirmation:
+        fields["live_confirmation"] = True
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _normalize_dates(request: BacktestRequest) -> tuple[datetime, datetime]:
+    return to_utc_naive(request.start_date), to_utc_naive(request.end_date)
+
+
+def find_stored_result(db: Session, strategy: Strategy, request: BacktestRequest) -> BacktestResult | None:
+    """
+    A finished result for the same strategy version, ticker, timeframe and range.
+    Only results whose range had fully ended when they were computed are reused, so bars that
+    were still to come are never served from the store.
+    """
+    start, end = _normalize_dates(request)
+    return (
+        db.query(BacktestResult)
+        .filter(
+            BacktestResult.strategy_id == strategy.id,
+            BacktestResult.strategy_version == strategy_version(strategy, request.live_confirmation),
+            BacktestResult.ticker == request.ticker.upper(),
+            BacktestResult.timeframe == BACKTEST_TIMEFRAME,
+            BacktestResult.start_date == start,
+            BacktestResult.end_date == end,
+            BacktestResult.status == "done",
+            BacktestResult.end_date <= BacktestResult.started_at,
+        )
+        .order_by(BacktestResult.finished_at.desc())
+        .first()
+    )
+
+
+def _new_job(db: Session, strategy: Strategy, request: BacktestRequest, user_id: int) -> BacktestResult:
+    start, end = _normalize_dates(request)
+    job = BacktestResult(
+        user_id=user_id,
+        strategy_id=strategy.id,
+        strategy_version=strategy_version(strategy, request.live_confirmation),
+        ticker=request.ticker.upper(),
+        timeframe=BACKTEST_TIMEFRAME,
+        start_date=start,
+        end_date=end,
+        status="queued",
+        progress=0.0,
+        worker_id=WORKER_ID,
+        heartbeat_at=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _own(job.id)
+    return job
+
+
+def _own(job_id: int):
+    global _heartbeat_thread
+    with _owned_lock:
+        _owned_jobs.add(job_id)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="backtest-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+
+def _release(job_id: int):
+    with _owned_lock:
+        _owned_jobs.discard(job_id)
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        with _owned_lock:
+            job_ids = list(_owned_jobs)
+        if not job_ids:
+            continue
+
+        db = SessionLocal()
+        try:
+            db.query(BacktestResult).filter(
+                BacktestResult.id.in_(job_ids),
+                BacktestResult.worker_id == WORKER_ID,
+                BacktestResult.status.in_(ACTIVE_STATUSES),
+            ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            # A missed beat is retried on the next interval; only HEARTBEAT_TIMEOUT of them fails the jobs
+            db.rollback()
+        finally:
+            db.close()
+
+
+def _stale_filter(now: datetime):
+    cutoff = now - timedelta(seconds=HEARTBEAT_TIMEOUT)
+    return (
+        BacktestResult.status.in_(ACTIVE_STATUSES),
+        func.coalesce(BacktestResult.heartbeat_at, BacktestResult.created_at) < cutoff,
+    )
+
+
+def _get_strategy(db: Session, request: BacktestRequest, user_id: int) -> Strategy:
+    strategy = db.query(Strategy).filter_by(id=request.strategy_id, user_id=user_id).first()
+    if not strategy:
+        raise ValueError("Strategy not found")
+    return strategy
+
+
+def submit_backtest(request: BacktestRequest, user_id: int, db: Session) -> tuple[BacktestResult, bool]:
+    """Queue a backtest job; returns (job, cached), where a cached job is an already finished identical run."""
+    strategy = _get_strategy(db, request, user_id)
+
+    stored = find_stored_result(db, strategy, request)
+    if stored:
+        return stored, True
+
+    job = _new_job(db, strategy, request, user_id)
+    _executor.submit(_run_job, job.id, request, user_id)
+    return job, False
+
+
+def run_backtest_stored(request: BacktestRequest, user_id: int, db: Session) -> dict:
+    """
+    Synchronous counterpart of submit_backtest: serve an identical stored run, otherwise compute one
+    without persisting it (only the job API stores rows). The result carries the stored job id, or None.
+    """
+    strategy = _get_strategy(db, request, user_id)
+
+    stored = find_stored_result(db, strategy, request)
+    if stored:
+        return {"id": stored.id, "metrics": stored.metrics, "equity_curve": stored.equity_curve, "trades": stored.trades}
+
+    return {"id": None, **run_backtest(request, user_id, db)}
+
+
+def get_backtest_job(job_id: int, user_id: int, db: Session) -> BacktestResult | None:
+    job = db.query(BacktestResult).filter_by(id=job_id, user_id=user_id).first()
+    if job and job.status in ACTIVE_STATUSES:
+        # The owning process may have died since the last startup sweep
+        failed = (
+            db.query(BacktestResult)
+            .filter(BacktestResult.id == job_id, *_stale_filter(datetime.utcnow()))
+            .update(_interrupted(), synchronize_session=False)
+        )
+        db.commit()
+        if failed:
+            db.refresh(job)
+    return job
+
+
+def cancel_backtest(job_id: int, user_id: int, db: Session) -> BacktestResult | None:
+    """Mark a queued or running job as cancelled; a running job stops at its next progress report."""
+    job = get_backtest_job(job_id, user_id, db)
+    if job and job.status in ACTIVE_STATUSES:
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    return job
+
+
+def fail_interrupted_jobs() -> int:
+    """
+    Mark failed the queued or running jobs whose owning process stopped sending heartbeats.
+    Jobs of other live workers keep beating and are left alone.
+    """
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(BacktestResult)
+            .filter(*_stale_filter(datetime.utcnow()))
+            .update(_interrupted(), synchronize_session=False)
+        )
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+class JobProgress:
+    """Progress callback of a running job: writes at most every PROGRESS_INTERVAL seconds and aborts the run once the job is cancelled."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.last_write = 0.0
+
+    def __call__(self, fraction: float):
+        now = time.monotonic()
+        if now - self.last_write < PROGRESS_INTERVAL:
+            return
+        self.last_write = now
+
+        db = SessionLocal()
+        try:
+            updated = (
+                db.query(BacktestResult)
+                .filter(BacktestResult.id == self.job_id, BacktestResult.status == "running")
+                .update({"progress": round(min(max(fraction, 0.0), 1.0), 3)}, synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        if not updated:
+            raise BacktestCancelled()
+
+
+def _run_job(job_id: int, request: BacktestRequest, user_id: int):
+    db = SessionLocal()
+    try:
+        _execute(job_id, request, user_id, db)
+    finally:
+        _release(job_id)
+        db.close()
+
+
+def _execute(job_id: int, request: BacktestRequest, user_id: int, db: Session):
+    started = (
+        db.query(BacktestResult)
+        .filter(BacktestResult.id == job_id, BacktestResult.status == "queued")
+        .update({"status": "running", "started_at": datetime.utcnow(), "heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    if not started:
+        return
+
+    try:
+        result = run_backtest(request, user_id, db, progress=JobProgress(job_id))
+    except Exception as e:
+        db.rollback()
+        job = db.get(BacktestResult, job_id)
+        db.refresh(job)
+        # A cancelled run may surface as any exception, depending on where it was interrupted
+        if job.status == "running":
+            job.status = "failed"
+            job.error = str(e) or e.__class__.__name__
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        print(f"Backtest job {job_id} stopped: {job.status} ({e.__class__.__name__}: {e})")
+        return
+
+    job = db.get(BacktestResult, job_id)
+    db.refresh(job)
+    if job.status != "running":
+        return
+    job.status = "done"
+    job.progress = 1.0
+    job.metrics = result["metrics"]
+    job.equity_curve = result["equity_curve"]
+    job.trades = result["trades"]
+    job.finished_at = datetime.utcnow()
+    db.commit()
@@ -1,10 +1,23 @@
+import hashlib
+import threading
 import alpaca_trade_api as tradeapi
+from sqlalchemy import event
 from models.broker import UserBroker
 
+# Warm API clients keyed by (broker id, credential hash); a changed key/secret/url never reuses an old client
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _credential_hash(broker: UserBroker) -> str:
+    raw = "|".join([broker.broker or "", broker.api_key or "", broker.api_secret or "", broker.base_url or ""])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
 def get_alpaca_api_from_broker(broker: UserBroker):
     if not broker.api_key or not broker.api_secret or not broker.base_url:
         raise ValueError("Alpaca credentials are incomplete.")
-    
+
     return tradeapi.REST(
         key_id=broker.api_key,
         secret_key=broker.api_secret,
@@ -12,7 +25,33 @@ def get_alpaca_api_from_broker(broker: UserBroker):
         api_version='v2'
     )
 
-def get_api_client(broker: UserBroker):
+def _build_api_client(broker: UserBroker):
     if broker.broker.lower() == "alpaca":
         return get_alpaca_api_from_broker(broker)
-    raise NotImplementedError(f"Broker '{broker.broker}' not supported.")
\ No newline at end of file
+    raise NotImplementedError(f"Broker '{broker.broker}' not supported.")
+
+def get_api_client(broker: UserBroker):
+    key = (broker.id, _credential_hash(broker))
+
+    with _clients_lock:
+        client = _clients.get(key)
+    if client is not None:
+        return client
+
+    client = _build_api_client(broker)
+    with _clients_lock:
+        # Drop clients built for this broker's previous credentials
+        for stale in [k for k in _clients if k[0] == broker.id and k != key]:
+            del _clients[stale]
+        return _clients.setdefault(key, client)
+
+def invalidate_api_client(broker_id: int):
+    with _clients_lock:
+        for key in [k for k in _clients if k[0] == broker_id]:
+            del _clients[key]
+
+
+@event.listens_for(UserBroker, "after_update")
+@event.listens_for(UserBroker, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_api_client(target.id)
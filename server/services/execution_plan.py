@@ -0,0 +1,91 @@
+"""
+Execution plan of one scheduler tick.
+
+The enabled strategies are loaded together with everything a check touches (owner, connected
+brokers, preferences, linked tickers) in a fixed number of queries, and frozen into namedtuples.
+Workers read the plan instead of lazy-loading relationships per strategy and ticker, and it cannot
+change under them while the tick runs.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from database import SessionLocal
+from models.strategy import Strategy
+from models.strategy_ticker import StrategyTicker
+from models.user import User
+
+StrategyJob = namedtuple("StrategyJob", ["strategy", "ticker"])
+UserPlan = namedtuple("UserPlan", ["user", "jobs"])
+ExecutionPlan = namedtuple("ExecutionPlan", ["now", "users", "strategies"])
+
+_snapshot_types = {}
+
+
+def parse_check_frequency(freq: str) -> timedelta:
+    mapping = {
+        "1 Minute": timedelta(minutes=1),
+        "5 Minutes": timedelta(minutes=5),
+        "15 Minutes": timedelta(minutes=15),
+        "1 Hour": timedelta(hours=1),
+        "1 Day": timedelta(days=1),
+    }
+    return mapping.get(freq, timedelta(hours=1))
+
+
+def freeze(row, **extra):
+    """Namedtuple of the column values of an ORM row, plus `extra` fields."""
+    model = type(row)
+    columns = [attr.key for attr in inspect(model).column_attrs]
+    key = (model, tuple(extra))
+    if key not in _snapshot_types:
+        _snapshot_types[key] = namedtuple(f"{model.__name__}Snapshot", columns + list(extra))
+    return _snapshot_types[key](*(getattr(row, column) for column in columns), *extra.values())
+
+
+def load_execution_plan(now: datetime) -> ExecutionPlan:
+    """Enabled strategies due at `now`, grouped by user, with their tickers, brokers and preferences."""
+    db = SessionLocal()
+    try:
+        strategies = (
+            db.query(Strategy)
+            .filter(Strategy.is_enabled == True)
+            .options(
+                joinedload(Strategy.user).joinedload(User.preferences),
+                joinedload(Strategy.user).selectinload(User.brokers),
+                selectinload(Strategy.tickers).joinedload(StrategyTicker.user_stock),
+            )
+            .order_by(Strategy.id)
+            .all()
+        )
+
+        users = {}
+        jobs = {}
+        due = []
+        for strategy in strategies:
+            interval = parse_check_frequency(strategy.market_check_frequency)
+            if strategy.last_checked and (now - strategy.last_checked) < interval:
+                print(f"Skipping '{strategy.title}' (too early)")
+                continue
+
+            owner = strategy.user
+            if owner.id not in users:
+                users[owner.id] = freeze(
+                    owner,
+                    brokers=tuple(freeze(broker) for broker in owner.brokers if broker.is_connected),
+                    preferences=freeze(owner.preferences) if owner.preferences else None,
+                )
+                jobs[owner.id] = []
+
+            frozen = freeze(strategy)
+            due.append(frozen)
+            jobs[owner.id].extend(StrategyJob(frozen, link.user_stock.ticker) for link in strategy.tickers if link.user_stock)
+
+        return ExecutionPlan(
+            now=now,
+            users=tuple(UserPlan(users[user_id], tuple(jobs[user_id])) for user_id in users),
+            strategies=tuple(due),
+        )
+    finally:
+        db.close()
@@ -0,0 +1,90 @@
+"""
+Unit of work for the signal and trade logs written by strategy checks.
+
+Checks add new SignalLog / TradeLog rows and record status transitions through a LogWriter instead
+of committing each change. flush() writes everything in one transaction: new rows as batched
+INSERTs, transitions as executemany UPDATEs by primary key, then the daily PnL rollup of trades
+whose PnL was set. Callers flush before submitting an order, so the signal and the pending trade
+are durable by the time the broker sees the order; everything else waits for the end of the pass.
+"""
+
+from collections import defaultdict
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from models.trade_log import TradeLog
+from services.pnl_rollup import refresh_daily_pnl
+
+
+class LogWriter:
+    def __init__(self, db: Session):
+        self.db = db
+        self.inserts = []
+        self.updates = []
+        self.flushes = 0
+
+    def add(self, row):
+        self.inserts.append(row)
+        return row
+
+    def update(self, row, **values):
+        """Record a transition of `row`; buffered rows are changed in place, stored rows on flush."""
+        if inspect(row).transient:
+            for key, value in values.items():
+                setattr(row, key, value)
+            return
+        self.updates.append((row, values))
+        for key, value in values.items():
+            set_committed_value(row, key, value)
+
+    def mark(self) -> tuple[int, int, int]:
+        return self.flushes, len(self.inserts), len(self.updates)
+
+    def discard(self, mark: tuple[int, int, int] = None):
+        """Drop what was buffered after `mark` (everything without one), e.g. by a check that failed halfway."""
+        flushes, inserts, updates = mark or (self.flushes, 0, 0)
+        if flushes != self.flushes:
+            # Flushed since the mark: whatever is buffered now came after it
+            inserts = updates = 0
+        del self.inserts[inserts:]
+        del self.updates[updates:]
+
+    def flush(self):
+        if not self.inserts and not self.updates:
+            return
+
+        rollup = [row for row in self.inserts if isinstance(row, TradeLog) and row.pnl is not None]
+        self.db.add_all(self.inserts)
+        self.db.flush()
+
+        merged = {}
+        for row, values in self.updates:
+            key = (type(row), row.id)
+            merged.setdefault(key, {"id": row.id}).update(values)
+            if isinstance(row, TradeLog) and "pnl" in values:
+                rollup.append(row)
+
+        rows_by_model = defaultdict(list)
+        for (model, _), values in merged.items():
+            rows_by_model[model].append(values)
+        for model, rows in rows_by_model.items():
+            self.db.execute(update(model), rows)
+
+        buckets = {(t.user_id, t.strategy_id, t.symbol, t.timestamp.date()): t for t in rollup}
+        # Sorted, so concurrent flushes take the bucket locks in the same order
+        for key in sorted(buckets):
+            refresh_daily_pnl(self.db, buckets[key])
+
+        self.db.commit()
+        self.inserts.clear()
+        self.updates.clear()
+        self.flushes += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
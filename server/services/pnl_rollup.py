@@ -0,0 +1,111 @@
+"""
+Daily PnL rollup of closed trades per (user, strategy, symbol, day).
+
+A trade contributes when it is not an open order and has a PnL, the same rows the analytics
+endpoints used to aggregate from trade_logs. Whenever a trade's PnL is set or edited, its bucket is
+recomputed from trade_logs and upserted under a per-bucket transaction lock, so the rollup stays
+exact without tracking old values.
+
+Backfill existing history with:
+    python -m services.pnl_rollup [--user-id ID]
+"""
+
+import argparse
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.daily_pnl import DailyPnl
+from models.trade_log import TradeLog
+
+CONTRIBUTING_TRADES = (TradeLog.is_order == False, TradeLog.pnl.isnot(None))
+BUCKET_COLUMNS = ["user_id", "strategy_id", "symbol", "day"]
+
+
+def _insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's database (Postgres, SQLite in tests)."""
+    return sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+
+def _lock_bucket(db: Session, bucket: dict):
+    """
+    Serialize refreshes of one bucket until the transaction ends. Without it, two transactions editing
+    trades of the same bucket (a scheduler pass and a trade edit) each sum trade_logs without the
+    other's uncommitted change, and whichever commits last upserts a stale total. With it, the second
+    one waits and recomputes after the first committed. SQLite serializes writers on its own.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    name = "|".join(str(bucket[column]) for column in BUCKET_COLUMNS)
+    key = int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+    db.execute(select(func.pg_advisory_xact_lock(key)))
+
+
+def refresh_daily_pnl(db: Session, trade: TradeLog):
+    """
+    Recompute the rollup bucket of `trade`; the caller commits. Callers refreshing several buckets in
+    one transaction should do so in sorted bucket order, so concurrent transactions lock in the same order.
+    """
+    db.flush()
+    day = trade.timestamp.date()
+    start = datetime.combine(day, datetime.min.time())
+    bucket = {"user_id": trade.user_id, "strategy_id": trade.strategy_id, "symbol": trade.symbol, "day": day}
+    _lock_bucket(db, bucket)
+
+    pnl, trades = db.execute(
+        select(func.coalesce(func.sum(TradeLog.pnl), 0.0), func.count())
+        .where(
+            TradeLog.user_id == trade.user_id,
+            TradeLog.strategy_id == trade.strategy_id,
+            TradeLog.symbol == trade.symbol,
+            TradeLog.timestamp >= start,
+            TradeLog.timestamp < start + timedelta(days=1),
+            *CONTRIBUTING_TRADES,
+        )
+    ).one()
+
+    if not trades:
+        db.query(DailyPnl).filter_by(**bucket).delete(synchronize_session=False)
+        return
+
+    statement = _insert(db)(DailyPnl).values(**bucket, pnl=pnl, trades=trades, updated_at=datetime.utcnow())
+    db.execute(statement.on_conflict_do_update(
+        index_elements=BUCKET_COLUMNS,
+        set_={"pnl": statement.excluded.pnl, "trades": statement.excluded.trades, "updated_at": statement.excluded.updated_at},
+    ))
+
+
+def backfill_daily_pnl(db: Session, user_id: int = None) -> int:
+    """Rebuild the rollup from trade_logs, for one user or everyone; returns the number of buckets."""
+    day = func.date(TradeLog.timestamp)
+    buckets = (
+        select(TradeLog.user_id, TradeLog.strategy_id, TradeLog.symbol, day, func.sum(TradeLog.pnl), func.count(), func.now())
+        .where(*CONTRIBUTING_TRADES)
+        .group_by(TradeLog.user_id, TradeLog.strategy_id, TradeLog.symbol, day)
+    )
+    stale = db.query(DailyPnl)
+    if user_id is not None:
+        buckets = buckets.where(TradeLog.user_id == user_id)
+        stale = stale.filter(DailyPnl.user_id == user_id)
+
+    stale.delete(synchronize_session=False)
+    result = db.execute(_insert(db)(DailyPnl).from_select(
+        BUCKET_COLUMNS + ["pnl", "trades", "updated_at"], buckets,
+    ))
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily PnL rollup from trade logs")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's rollup")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = backfill_daily_pnl(db, args.user_id)
+        print(f"Rebuilt {count} daily PnL buckets")
+    finally:
+        db.close()
@@ -1,17 +1,20 @@
 from models.strategy import Strategy
 from models.signal_log import SignalLog
 from models.trade_log import TradeLog
-from data.automation_data import fetch_intraday_alpaca
-from services.alpaca_service import place_order, check_account, get_positions
+from data.bar_cache import BarCache
+from services.alpaca_service import place_order
+from services.account_snapshot import AccountSnapshot
+from services.log_writer import LogWriter
 from services.email_service import send_signal_notification, send_order_filled_notification, send_error_notification
-from models.user_preferences import UserPreferences
 from sqlalchemy.orm import Session
 from ai_model.predictors.predict_conservative import predict_signals
 import pandas as pd
 from ai_model.strategies.conservative_executor import run_conservative_strategy
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
 
+ML_WINDOW_DAYS = 20
+
 def clean_debug_data(data: dict):
     def convert(val):
         if isinstance(val, (pd.Timestamp, datetime)):
@@ -22,7 +25,11 @@ def clean_debug_data(data: dict):
 
     return {k: convert(v) for k, v in data.items()}
 
-def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session):
+def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Session, bars: BarCache = None, snapshot: AccountSnapshot = None, logs: LogWriter = None):
+    if logs is None:
+        with LogWriter(db) as logs:
+            return run_tf_strategy_for_ticker(strategy, ticker, user, db, bars=bars, snapshot=snapshot, logs=logs)
+
     print(f"ML Strategy '{strategy.title}' checking {ticker}...")
 
     broker = next((b for b in user.brokers if b.is_connected), None)
@@ -30,16 +37,12 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
         print(f"No connected broker for user {user.id}")
         return
     
-    end = datetime.utcnow()
-    start = end - timedelta(days=20)
-
+    if bars is None:
+        bars = BarCache()
+    if snapshot is None:
+        snapshot = AccountSnapshot()
 
-    df = fetch_intraday_alpaca(
-        symbol=ticker,
-        timeframe=strategy.default_timeframe,
-        start_date=start,
-        end_date=end
-    )
+    df = bars.get(ticker, strategy.default_timeframe, days=ML_WINDOW_DAYS)
     if df is None or df.empty:
         print(f"No data for {ticker}")
         return
@@ -49,8 +52,7 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
         print(f"No prediction for {ticker}")
         return
 
-    positions = get_positions(broker)
-    alpaca_pos = next((p for p in positions if p["symbol"] == ticker), None)
+    alpaca_pos = snapshot.get_position(broker, ticker)
 
     current_position = None
     if alpaca_pos:
@@ -88,7 +90,7 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
     qty = None
     notional = None
 
-    account = check_account(broker)
+    account = snapshot.get_account(broker)
     if strategy.use_balance_percent:
         cash = float(account["cash"])
         amount = cash * (strategy.trade_amount / 100)
@@ -112,10 +114,9 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
             debug_data=debug_data,
             executed=False
         )
-        db.add(signal_log)
-        db.commit()
+        logs.add(signal_log)
 
-        prefs = db.query(UserPreferences).filter_by(user_id=user.id).first()
+        prefs = user.preferences
         if prefs and prefs.email_alerts_enabled and prefs.notify_on_signal:
             try:
                 send_signal_notification(user.email, ticker, direction, price)
@@ -134,10 +135,11 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
             is_order=True,
             status="pending"
         )
-        db.add(trade)
-        db.commit()
+        logs.add(trade)
 
         if strategy.automation_mode == "FullAuto":
+            # The signal and the pending trade must be stored before the broker sees the order
+            logs.flush()
             try:
                 order = place_order(
                     broker=broker,
@@ -148,12 +150,9 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
                     qty=qty,
                     notional=notional
                 )
-                trade.status = "matched"
-                trade.is_order = False
-                trade.broker_order_id = getattr(order, "id", None)
-                signal_log.executed = True
-                signal_log.result = "matched"
-                db.commit()
+                snapshot.apply_fill(broker, ticker, "buy" if direction == "long" else "sell", float(price), qty=qty, notional=notional)
+                logs.update(trade, status="matched", is_order=False, broker_order_id=getattr(order, "id", None))
+                logs.update(signal_log, executed=True, result="matched")
 
                 print(f"Order placed: {ticker} at {price}")
 
@@ -161,9 +160,8 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
                     send_order_filled_notification(user.email, ticker, price, notional or qty)
 
             except Exception as e:
-                trade.status = "rejected"
-                signal_log.result = f"failed: {str(e)}"
-                db.commit()
+                logs.update(trade, status="rejected")
+                logs.update(signal_log, result=f"failed: {str(e)}")
                 print(f"Order failed: {e}")
 
     elif action == "close":
@@ -180,12 +178,10 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
       )
 
       if last_open:
-          last_open.exit_price = price
-          last_open.exit_time = time
-          last_open.pnl = (price - last_open.price) if last_open.action == "buy" else (last_open.price - price)
-          db.commit()
+          pnl = (price - last_open.price) if last_open.action == "buy" else (last_open.price - price)
+          logs.update(last_open, exit_price=price, exit_time=time, pnl=pnl)
           print(f"Closed tracked position in DB for {ticker} due to {decision.get('reason')}")
-          prefs = db.query(UserPreferences).filter_by(user_id=user.id).first()
+          prefs = user.preferences
           if prefs and prefs.email_alerts_enabled and prefs.notify_on_order_filled:
               try:
                   send_order_filled_notification(user.email, ticker, price, qty)
@@ -209,10 +205,9 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
               is_order=False,
               status="matched"
           )
-          db.add(trade)
-          db.commit()
+          logs.add(trade)
           print(f"Closed broker-reported position on {ticker} due to {decision.get('reason')}")
-          prefs = db.query(UserPreferences).filter_by(user_id=user.id).first()
+          prefs = user.preferences
           if prefs and prefs.email_alerts_enabled and prefs.notify_on_order_filled:
               try:
                   send_order_filled_notification(user.email, ticker, price, qty)
@@ -221,6 +216,7 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
       else:
           print(f"No position to close for {ticker} (neither in DB nor from broker)")
       if strategy.automation_mode == "FullAuto":
+        logs.flush()
         try:
             order = place_order(
                 broker=broker,
@@ -231,6 +227,7 @@ def run_tf_strategy_for_ticker(strategy: Strategy, ticker: str, user, db: Sessio
                 qty=qty,
                 notional=notional
             )
+            snapshot.apply_fill(broker, ticker, "sell" if direction == "long" else "buy", float(price), qty=qty, notional=notional)
             print(f"Close order placed: {ticker} at {price}")
         except Exception as e:
             print(f"Failed to place close order: {e}")
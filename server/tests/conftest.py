@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Models bind to database.engine at import time; tests never need the real Postgres database
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+
+
+def make_bars(n: int, seed: int = 0, start: str = "2024-01-02 14:30", freq: str = "h") -> pd.DataFrame:
+    """Random-walk OHLCV bars on a UTC index."""
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    spread = rng.uniform(0.1, 1.5, n)
+    index = pd.date_range(start, periods=n, freq=freq, tz="UTC")
+    return pd.DataFrame({
+        "Open": close + rng.normal(0, 0.3, n),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(100, 10_000, n).astype(float),
+    }, index=index)
+
+
+@pytest.fixture
+def bars():
+    return make_bars(300)
+
+
+@pytest.fixture
+def db():
+    """Session on a fresh schema of all models."""
+    import models  # noqa: F401  registers every table on Base
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("alpaca_trade_api")
+
+from services import account_snapshot
+from services.account_snapshot import AccountSnapshot
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    monkeypatch.setattr(account_snapshot, "get_positions", lambda broker: [])
+    return AccountSnapshot()
+
+
+BROKER = SimpleNamespace(id=1)
+
+
+def test_fills_accumulate(snapshot):
+    snapshot.apply_fill(BROKER, "AAPL", "buy", 100.0, qty=2)
+    snapshot.apply_fill(BROKER, "AAPL", "buy", 110.0, qty=2)
+    position = snapshot.get_position(BROKER, "AAPL")
+    assert position["qty"] == 4
+    assert position["avg_entry_price"] == pytest.approx(105.0)
+
+
+def test_notional_round_trip_closes_the_position(snapshot):
+    price = 187.37
+    snapshot.apply_fill(BROKER, "AAPL", "buy", price, notional=100.0)
+    for _ in range(3):
+        snapshot.apply_fill(BROKER, "AAPL", "sell", price, notional=100.0 / 3)
+    assert snapshot.get_position(BROKER, "AAPL") is None
+
+
+def test_reversal_keeps_the_remainder(snapshot):
+    snapshot.apply_fill(BROKER, "AAPL", "buy", 100.0, qty=1)
+    snapshot.apply_fill(BROKER, "AAPL", "sell", 120.0, qty=3)
+    position = snapshot.get_position(BROKER, "AAPL")
+    assert position["qty"] == -2
+    assert position["avg_entry_price"] == 120.0
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import make_bars
+from utils.backtest_run import EXIT_OPEN
+from utils.backtest_sweep import apply_parameters, run_sweep, strategy_config
+from utils.calculate_metrics import calculate_run_metrics
+from utils.simulate_rule_strategy import simulate_rule_strategy
+
+
+@pytest.fixture
+def strategy():
+    return SimpleNamespace(
+        id=None,
+        updated_at=None,
+        buy_signals=[{"indicator": "RSI", "operator": "<", "value": 40}],
+        sell_signals=[{"indicator": "RSI", "operator": ">", "value": 60}],
+        signal_logic="AND",
+        stop_loss=None,
+        take_profit=None,
+        confirmation_candles=3,
+    )
+
+
+PARAMETERS = {"stop_loss": [None, 1, 2], "buy_signals.0.value": [30, 40, 50]}
+
+
+@pytest.mark.parametrize("live_confirmation", [False, True])
+def test_every_result_reproduces_as_a_single_run(strategy, live_confirmation):
+    df = make_bars(600, seed=31)
+    sweep = run_sweep(strategy, df, PARAMETERS, workers=1, live_confirmation=live_confirmation)
+    assert sweep["live_confirmation"] is live_confirmation
+    assert sweep["combinations"] == 9
+
+    for result in sweep["results"]:
+        single = apply_parameters(strategy_config(strategy), result["parameters"])
+        run = simulate_rule_strategy(single, df, confirm=live_confirmation)
+        assert result["metrics"] == calculate_run_metrics(run.equity, run.pnl[run.reason != EXIT_OPEN])
+
+
+def test_confirmation_changes_the_results(strategy):
+    df = make_bars(600, seed=31)
+    plain = run_sweep(strategy, df, PARAMETERS, workers=1)
+    confirmed = run_sweep(strategy, df, PARAMETERS, workers=1, live_confirmation=True)
+    assert [r["metrics"] for r in plain["results"]] != [r["metrics"] for r in confirmed["results"]]
+
+
+def test_sweeping_confirmation_candles_requires_live_confirmation(strategy):
+    df = make_bars(100)
+    with pytest.raises(ValueError):
+        run_sweep(strategy, df, {"confirmation_candles": [1, 2]}, workers=1)
+    assert run_sweep(strategy, df, {"confirmation_candles": [1, 2]}, workers=1, live_confirmation=True)["combinations"] == 2
@@ -0,0 +1,90 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_bars
+from data import bar_store
+from data.bar_store import frame_to_records, load_bars, read_bars, save_bars
+
+START, END = datetime(2024, 1, 2), datetime(2024, 1, 20)
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "BAR_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def data_files(store_dir, timeframe="1Hour"):
+    return sorted(name for name in os.listdir(store_dir / timeframe) if name.endswith(".npy"))
+
+
+def test_round_trip(store_dir):
+    records = frame_to_records(make_bars(50))
+    save_bars("AAPL", "1Hour", records, START, END)
+
+    loaded, coverage = load_bars("AAPL", "1Hour")
+    np.testing.assert_array_equal(loaded, records)
+    assert coverage == (START, END)
+
+
+def test_new_generation_replaces_the_previous_file(store_dir):
+    first, second = frame_to_records(make_bars(50)), frame_to_records(make_bars(60, seed=1))
+    save_bars("AAPL", "1Hour", first, START, END)
+    reader, _ = load_bars("AAPL", "1Hour")
+
+    save_bars("AAPL", "1Hour", second, START, END)
+    loaded, _ = load_bars("AAPL", "1Hour")
+
+    np.testing.assert_array_equal(loaded, second)
+    # A reader that mapped the old generation still sees consistent data
+    np.testing.assert_array_equal(reader, first)
+    assert len(data_files(store_dir)) == 1
+    assert not [name for name in os.listdir(store_dir / "1Hour") if name.endswith(".tmp")]
+
+
+def test_reads_legacy_layout(store_dir):
+    records = frame_to_records(make_bars(20))
+    os.makedirs(store_dir / "1Hour")
+    np.save(store_dir / "1Hour" / "AAPL.npy", records)
+    with open(store_dir / "1Hour" / "AAPL.json", "w") as f:
+        json.dump({"start": START.isoformat(), "end": END.isoformat()}, f)
+
+    loaded, coverage = load_bars("AAPL", "1Hour")
+    np.testing.assert_array_equal(loaded, records)
+
+    save_bars("AAPL", "1Hour", records, START, END)
+    assert data_files(store_dir) != ["AAPL.npy"] and len(data_files(store_dir)) == 1
+
+
+def test_symbols_sharing_a_prefix_keep_their_files(store_dir, monkeypatch):
+    monkeypatch.setattr(bar_store, "STALE_GENERATION_SECONDS", -1)
+    save_bars("BRK.B", "1Hour", frame_to_records(make_bars(10)), START, END)
+    save_bars("BRK", "1Hour", frame_to_records(make_bars(10, seed=1)), START, END)
+    save_bars("BRK", "1Hour", frame_to_records(make_bars(10, seed=2)), START, END)
+
+    assert load_bars("BRK.B", "1Hour")[0] is not None
+    assert len(data_files(store_dir)) == 2
+
+
+def test_read_bars_downloads_only_missing_ranges():
+    df = make_bars(24 * 30, start="2024-01-01", freq="h")
+    calls = []
+
+    def download(symbol, start, end, timeframe):
+        calls.append((start, end))
+        return df.loc[pd.Timestamp(start, tz="UTC"):pd.Timestamp(end, tz="UTC")]
+
+    first = read_bars("AAPL", "1Hour", datetime(2024, 1, 10), datetime(2024, 1, 15), download)
+    again = read_bars("AAPL", "1Hour", datetime(2024, 1, 11), datetime(2024, 1, 14), download)
+    wider = read_bars("AAPL", "1Hour", datetime(2024, 1, 5), datetime(2024, 1, 20), download)
+
+    assert len(calls) == 3
+    assert calls[1] == (datetime(2024, 1, 5), datetime(2024, 1, 10))
+    pd.testing.assert_frame_equal(again, first.loc[pd.Timestamp("2024-01-11", tz="UTC"):pd.Timestamp("2024-01-14", tz="UTC")], check_freq=False)
+    expected = df.loc["2024-01-05":"2024-01-20 00:00"]
+    np.testing.assert_array_equal(wider["Close"].to_numpy(), expected["Close"].to_numpy())
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import make_bars
+from utils.simulate_rule_strategy import confirm_signals, rule_signals
+
+
+def reference_confirm(mask, candles):
+    """What the live check does at every bar: all of the last `candles` rows must signal."""
+    candles = max(candles or 1, 1)
+    return np.array([i >= candles - 1 and mask[i - candles + 1:i + 1].all() for i in range(len(mask))], dtype=bool)
+
+
+@pytest.mark.parametrize("candles", [None, 0, 1, 2, 3, 7, 60])
+@pytest.mark.parametrize("density", [0.2, 0.6, 0.95])
+def test_matches_live_confirmation(candles, density):
+    mask = np.random.default_rng(candles or 0).random(500) < density
+    np.testing.assert_array_equal(confirm_signals(mask, candles), reference_confirm(mask, candles))
+
+
+def test_does_not_modify_the_mask():
+    mask = np.array([True, True, False, True, True, True])
+    before = mask.copy()
+    assert confirm_signals(mask, 2).tolist() == [False, True, False, False, True, True]
+    np.testing.assert_array_equal(mask, before)
+
+
+def test_window_longer_than_the_series():
+    assert not confirm_signals(np.ones(3, dtype=bool), 5).any()
+
+
+def test_rule_signals_only_confirm_when_asked():
+    df = make_bars(400, seed=21)
+    strategy = SimpleNamespace(
+        buy_signals=[{"indicator": "RSI", "operator": "<", "value": 45}],
+        sell_signals=[{"indicator": "RSI", "operator": ">", "value": 55}],
+        signal_logic="AND",
+        confirmation_candles=3,
+    )
+
+    _, _, buy, sell = rule_signals(strategy, df)
+    _, _, confirmed_buy, confirmed_sell = rule_signals(strategy, df, confirm=True)
+
+    assert (buy != confirmed_buy).any()
+    np.testing.assert_array_equal(confirmed_buy, reference_confirm(buy, 3))
+    np.testing.assert_array_equal(confirmed_sell, reference_confirm(sell, 3))
@@ -0,0 +1,44 @@
+import pytest
+
+from conftest import make_bars
+from utils import indicators
+from utils.indicators import clear_indicator_cache, compute_indicator
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_indicator_cache()
+    yield
+    clear_indicator_cache()
+
+
+def cached_bytes():
+    return sum(size for _, size in indicators._cache.values())
+
+
+def test_results_are_memoized(bars):
+    assert compute_indicator(bars, "sma", window=5) is compute_indicator(bars.copy(), "sma", window=5)
+    assert compute_indicator(bars, "sma", window=5) is not compute_indicator(bars, "sma", window=6)
+
+
+def test_cache_stays_within_its_byte_budget(monkeypatch):
+    df = make_bars(1000)
+    entry = compute_indicator(df, "sma", window=2)
+    size = entry.nbytes + entry.index.nbytes
+    monkeypatch.setattr(indicators, "INDICATOR_CACHE_BYTES", size * 3)
+    clear_indicator_cache()
+
+    first = compute_indicator(df, "sma", window=2)
+    for window in range(3, 10):
+        compute_indicator(df, "sma", window=window)
+        assert indicators._cache_bytes == cached_bytes() <= size * 3
+
+    assert len(indicators._cache) == 3
+    # Least recently used entries went first
+    assert compute_indicator(df, "sma", window=2) is not first
+
+
+def test_result_larger_than_the_budget_is_not_cached(monkeypatch):
+    monkeypatch.setattr(indicators, "INDICATOR_CACHE_BYTES", 1024)
+    compute_indicator(make_bars(1000), "ema", span=10)
+    assert not indicators._cache and indicators._cache_bytes == 0
@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+
+from conftest import make_bars
+from utils.indicators import RULE_INDICATOR_COLUMNS, add_indicators, clear_indicator_cache
+from utils.online_indicators import ONLINE_HISTORY_ROWS, OnlineIndicatorStore
+
+ALL_RULE_COLUMNS = {column: spec for columns in RULE_INDICATOR_COLUMNS.values() for column, spec in columns.items()}
+
+ONLINE_COLUMNS = {
+    **ALL_RULE_COLUMNS,
+    "SMA_20": ("sma", {"window": 20}),
+    "EMA_10": ("ema", {"span": 10}),
+    "RSI_14": ("rsi", {"period": 14}),
+    "ATR": ("atr", {"window": 14}),
+}
+
+
+def batch(df: pd.DataFrame, columns: dict, rows: int) -> pd.DataFrame:
+    clear_indicator_cache()
+    return add_indicators(df.copy(), columns).tail(rows)
+
+
+def assert_matches_batch(window: pd.DataFrame, df: pd.DataFrame, columns: dict, rows: int):
+    expected = batch(df, columns, rows)
+    assert list(window.index) == list(expected.index)
+    pd.testing.assert_frame_equal(
+        window[list(expected.columns)], expected,
+        check_freq=False, check_dtype=False, rtol=1e-9, atol=1e-9,
+    )
+
+
+@pytest.mark.parametrize("column", sorted(ONLINE_COLUMNS))
+def test_each_indicator_matches_batch(bars, column):
+    columns = {column: ONLINE_COLUMNS[column]}
+    window = OnlineIndicatorStore().update("AAPL", "1Hour", bars, columns, rows=len(bars))
+    assert_matches_batch(window, bars, columns, len(bars))
+
+
+def test_incremental_updates_match_batch():
+    df = make_bars(260, seed=1)
+    store = OnlineIndicatorStore()
+    for end in (120, 121, 150, 151, 151, 200, 260):
+        window = store.update("AAPL", "1Hour", df.iloc[:end], ONLINE_COLUMNS, rows=3)
+        assert_matches_batch(window, df.iloc[:end], ONLINE_COLUMNS, 3)
+
+
+def test_forming_bar_is_not_committed():
+    df = make_bars(100, seed=2)
+    store = OnlineIndicatorStore()
+    store.update("AAPL", "1Hour", df, ONLINE_COLUMNS)
+
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 5
+    window = store.update("AAPL", "1Hour", revised, ONLINE_COLUMNS, rows=2)
+    assert_matches_batch(window, revised, ONLINE_COLUMNS, 2)
+
+
+def test_rebuilds_after_a_gap():
+    df = make_bars(200, seed=3)
+    store = OnlineIndicatorStore()
+    store.update("AAPL", "1Hour", df.iloc[:80], ONLINE_COLUMNS)
+
+    # The fetched window no longer contains the last committed bar
+    window = store.update("AAPL", "1Hour", df.iloc[100:], ONLINE_COLUMNS, rows=5)
+    assert_matches_batch(window, df.iloc[100:], ONLINE_COLUMNS, 5)
+
+
+def test_new_columns_extend_the_state():
+    df = make_bars(150, seed=4)
+    store = OnlineIndicatorStore()
+    store.update("AAPL", "1Hour", df.iloc[:100], RULE_INDICATOR_COLUMNS["RSI"])
+
+    window = store.update("AAPL", "1Hour", df, RULE_INDICATOR_COLUMNS["MACD"], rows=4)
+    assert_matches_batch(window, df, RULE_INDICATOR_COLUMNS["MACD"], 4)
+
+
+def test_window_longer_than_default_history():
+    df = make_bars(300, seed=5)
+    store = OnlineIndicatorStore()
+    rows = ONLINE_HISTORY_ROWS + 30
+    store.update("AAPL", "1Hour", df.iloc[:200], ONLINE_COLUMNS, rows=3)
+
+    window = store.update("AAPL", "1Hour", df.iloc[:250], ONLINE_COLUMNS, rows=rows)
+    assert len(window) == rows
+    assert_matches_batch(window, df.iloc[:250], ONLINE_COLUMNS, rows)
+
+    window = store.update("AAPL", "1Hour", df, ONLINE_COLUMNS, rows=rows)
+    assert_matches_batch(window, df, ONLINE_COLUMNS, rows)
+
+
+def test_states_are_kept_per_symbol_and_timeframe():
+    store = OnlineIndicatorStore()
+    a, b = make_bars(120, seed=6), make_bars(120, seed=7)
+    store.update("AAPL", "1Hour", a, ONLINE_COLUMNS)
+    store.update("MSFT", "1Hour", b, ONLINE_COLUMNS)
+    store.update("AAPL", "15Min", b, ONLINE_COLUMNS)
+
+    assert_matches_batch(store.update("AAPL", "1Hour", a, ONLINE_COLUMNS, rows=2), a, ONLINE_COLUMNS, 2)
+    assert_matches_batch(store.update("MSFT", "1Hour", b, ONLINE_COLUMNS, rows=2), b, ONLINE_COLUMNS, 2)
+
+
+def test_empty_frame():
+    assert OnlineIndicatorStore().update("AAPL", "1Hour", pd.DataFrame(), ONLINE_COLUMNS).empty
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.signal_log import SignalLog
+from utils.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_page
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2024, 3, 1, 14, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(datetime(2024, 1, 1), 1)[:-4], "MjAyNC0wMS0wMQ=="])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def add_signals(db, count, start=datetime(2024, 1, 1), same_time_every=3):
+    # Groups of rows share a timestamp so the id tie-break is exercised
+    rows = [
+        SignalLog(user_id=1, strategy_id=1, ticker="AAPL", action="buy", price=1.0,
+                  created_at=start + timedelta(minutes=i // same_time_every))
+        for i in range(count)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def page_through(db, limit, query=None):
+    query = query or db.query(SignalLog)
+    cursor, seen = None, []
+    while True:
+        rows, cursor = keyset_page(query, SignalLog.created_at, SignalLog.id, cursor, limit)
+        seen.extend(rows)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 25, 100])
+def test_pages_cover_every_row_once_newest_first(db, limit):
+    add_signals(db, 25)
+    seen = page_through(db, limit)
+    expected = db.query(SignalLog).order_by(SignalLog.created_at.desc(), SignalLog.id.desc()).all()
+    assert [row.id for row in seen] == [row.id for row in expected]
+
+
+def test_pages_are_stable_while_rows_are_added(db):
+    add_signals(db, 10)
+    first, cursor = keyset_page(db.query(SignalLog), SignalLog.created_at, SignalLog.id, None, 4)
+
+    add_signals(db, 5, start=datetime(2025, 1, 1))
+    second, _ = keyset_page(db.query(SignalLog), SignalLog.created_at, SignalLog.id, cursor, 4)
+
+    assert not {row.id for row in first} & {row.id for row in second}
+    assert max(row.created_at for row in second) <= min(row.created_at for row in first)
+
+
+def test_without_limit_returns_everything(db):
+    add_signals(db, 12)
+    rows, cursor = keyset_page(db.query(SignalLog), SignalLog.created_at, SignalLog.id, None, None)
+    assert len(rows) == 12 and cursor is None
+
+
+def test_limit_is_capped(db):
+    add_signals(db, MAX_PAGE_SIZE + 5, same_time_every=50)
+    rows, cursor = keyset_page(db.query(SignalLog), SignalLog.created_at, SignalLog.id, None, MAX_PAGE_SIZE * 2)
+    assert len(rows) == MAX_PAGE_SIZE and cursor is not None
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from models.daily_pnl import DailyPnl
+from models.trade_log import TradeLog
+from services.log_writer import LogWriter
+from services.pnl_rollup import backfill_daily_pnl, refresh_daily_pnl
+
+
+def rollup(db, user_id=None) -> dict:
+    query = db.query(DailyPnl)
+    if user_id is not None:
+        query = query.filter(DailyPnl.user_id == user_id)
+    return {(r.user_id, r.strategy_id, r.symbol, r.day): (round(r.pnl, 9), r.trades) for r in query}
+
+
+def expected_rollup(db, user_id=None) -> dict:
+    buckets = defaultdict(lambda: [0.0, 0])
+    for trade in db.query(TradeLog):
+        if trade.is_order or trade.pnl is None or (user_id is not None and trade.user_id != user_id):
+            continue
+        bucket = buckets[(trade.user_id, trade.strategy_id, trade.symbol, trade.timestamp.date())]
+        bucket[0] += trade.pnl
+        bucket[1] += 1
+    return {key: (round(pnl, 9), trades) for key, (pnl, trades) in buckets.items()}
+
+
+def random_trades(rng, count, start=datetime(2024, 5, 1, 22, 0)):
+    # Timestamps cluster around midnight so neighbouring trades fall on different days
+    return [
+        TradeLog(
+            user_id=int(rng.integers(1, 3)),
+            strategy_id=int(rng.integers(1, 3)),
+            symbol=str(rng.choice(["AAPL", "MSFT"])),
+            action="buy",
+            price=100.0,
+            quantity=1,
+            timestamp=start + timedelta(minutes=int(rng.integers(0, 4 * 24 * 60))),
+            is_order=bool(rng.random() < 0.3),
+            pnl=float(rng.normal(0, 5)) if rng.random() < 0.7 else None,
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_rollup_matches_backfill(db, seed):
+    rng = np.random.default_rng(seed)
+
+    with LogWriter(db) as logs:
+        for trade in random_trades(rng, 120):
+            logs.add(trade)
+    assert rollup(db) == expected_rollup(db)
+
+    # Trades close, get corrected, or lose their PnL again
+    with LogWriter(db) as logs:
+        for trade in db.query(TradeLog).order_by(TradeLog.id).all():
+            draw = rng.random()
+            if draw < 0.2:
+                logs.update(trade, pnl=float(rng.normal(0, 5)), is_order=False, status="closed")
+            elif draw < 0.3:
+                logs.update(trade, pnl=None)
+    assert rollup(db) == expected_rollup(db)
+
+    incremental = rollup(db)
+    backfill_daily_pnl(db)
+    assert rollup(db) == incremental
+
+
+def test_empty_bucket_is_removed(db):
+    trade = TradeLog(user_id=1, strategy_id=1, symbol="AAPL", action="sell", price=1.0, quantity=1,
+                     timestamp=datetime(2024, 5, 2, 10), is_order=False, pnl=3.5)
+    db.add(trade)
+    refresh_daily_pnl(db, trade)
+    db.commit()
+    assert rollup(db) == {(1, 1, "AAPL", date(2024, 5, 2)): (3.5, 1)}
+
+    trade.pnl = None
+    refresh_daily_pnl(db, trade)
+    db.commit()
+    assert rollup(db) == {}
+
+
+def test_backfill_for_one_user(db):
+    db.add_all(random_trades(np.random.default_rng(9), 80))
+    db.commit()
+
+    assert backfill_daily_pnl(db, user_id=1) == len(expected_rollup(db, user_id=1))
+    assert rollup(db) == expected_rollup(db, user_id=1)
+
+    backfill_daily_pnl(db)
+    assert rollup(db) == expected_rollup(db)
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import make_bars
+from utils.backtest_run import EXIT_OPEN, EXIT_SIGNAL, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT
+from utils.simulate_rule_strategy import rule_backtest_kernel, rule_signals, simulate_rule_strategy
+
+
+def reference_backtest(close, buy, sell, stop_loss=None, take_profit=None):
+    """The per-bar loop of simulate_rule_strategy before the kernel: (trades, equity)."""
+    position = entry_price = entry = None
+    trades, equity = [], []
+    cumulative = 0.0
+
+    for i, price in enumerate(close):
+        realized = 0.0
+        if position:
+            sl_hit = tp_hit = False
+            if stop_loss:
+                threshold = entry_price * (1 - stop_loss / 100) if position == 1 else entry_price * (1 + stop_loss / 100)
+                sl_hit = price <= threshold if position == 1 else price >= threshold
+            if take_profit:
+                threshold = entry_price * (1 + take_profit / 100) if position == 1 else entry_price * (1 - take_profit / 100)
+                tp_hit = price >= threshold if position == 1 else price <= threshold
+            if sl_hit or tp_hit:
+                realized = ((price - entry_price) if position == 1 else (entry_price - price)) / entry_price * 100
+                trades.append((entry, i, position, EXIT_STOP_LOSS if sl_hit else EXIT_TAKE_PROFIT, realized))
+                position = entry_price = None
+
+        if buy[i] and position is None:
+            position, entry_price, entry = 1, price, i
+        elif sell[i] and position is None:
+            position, entry_price, entry = -1, price, i
+        elif (sell[i] and position == 1) or (buy[i] and position == -1):
+            realized = ((price - entry_price) if position == 1 else (entry_price - price)) / entry_price * 100
+            trades.append((entry, i, position, EXIT_SIGNAL, realized))
+            position = entry_price = None
+
+        cumulative += realized
+        unrealized = 0.0
+        if position:
+            unrealized = ((price - entry_price) if position == 1 else (entry_price - price)) / entry_price * 100
+        equity.append(cumulative + unrealized)
+
+    if position:
+        trades.append((entry, -1, position, EXIT_OPEN, 0.0))
+    return trades, np.array(equity)
+
+
+def assert_same_run(run, close, buy, sell, stop_loss, take_profit):
+    trades, equity = reference_backtest(close, buy, sell, stop_loss, take_profit)
+    kernel_trades = list(zip(run.entry.tolist(), run.exit.tolist(), run.side.tolist(), run.reason.tolist(), run.pnl.tolist()))
+
+    assert [t[:4] for t in kernel_trades] == [t[:4] for t in trades]
+    np.testing.assert_allclose([t[4] for t in kernel_trades], [t[4] for t in trades], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(run.equity, equity, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("stop_loss, take_profit", [(None, None), (2, None), (None, 3), (1.5, 2.5), (0.3, 0.3)])
+@pytest.mark.parametrize("density", [0.01, 0.1, 0.5])
+@pytest.mark.parametrize("seed", range(4))
+def test_kernel_matches_per_bar_loop(seed, density, stop_loss, take_profit):
+    rng = np.random.default_rng(seed)
+    n = 1500
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    buy = rng.random(n) < density
+    sell = rng.random(n) < density
+
+    run = rule_backtest_kernel(np.arange(n), close, buy, sell, stop_loss=stop_loss, take_profit=take_profit)
+    assert_same_run(run, close, buy, sell, stop_loss, take_profit)
+
+
+def test_both_signals_open_long():
+    close = np.array([10.0, 11.0, 12.0, 11.0])
+    buy = np.array([True, False, False, False])
+    sell = np.array([True, False, True, False])
+
+    run = rule_backtest_kernel(np.arange(4), close, buy, sell)
+    assert run.side.tolist() == [1]
+    assert run.exit.tolist() == [2]
+    assert_same_run(run, close, buy, sell, None, None)
+
+
+def test_stop_loss_exit_may_reopen_on_the_same_bar():
+    close = np.array([100.0, 101.0, 95.0, 96.0])
+    buy = np.array([True, False, True, False])
+    sell = np.zeros(4, dtype=bool)
+
+    run = rule_backtest_kernel(np.arange(4), close, buy, sell, stop_loss=2)
+    assert run.entry.tolist() == [0, 2]
+    assert run.reason.tolist() == [EXIT_STOP_LOSS, EXIT_OPEN]
+    assert_same_run(run, close, buy, sell, 2, None)
+
+
+def test_no_signals():
+    close = np.linspace(100, 110, 50)
+    none = np.zeros(50, dtype=bool)
+    run = rule_backtest_kernel(np.arange(50), close, none, none)
+    assert len(run.entry) == 0
+    assert not run.equity.any()
+
+
+def test_simulate_rule_strategy_matches_per_bar_loop():
+    df = make_bars(800, seed=11)
+    strategy = SimpleNamespace(
+        buy_signals=[{"indicator": "RSI", "operator": "<", "value": 40}],
+        sell_signals=[{"indicator": "RSI", "operator": ">", "value": 60}],
+        signal_logic="AND",
+        stop_loss=1.0,
+        take_profit=2.0,
+        confirmation_candles=1,
+    )
+
+    run = simulate_rule_strategy(strategy, df)
+    assert len(run.entry) > 0
+    assert list(run.index) == list(df.index)
+
+    _, close, buy, sell = rule_signals(strategy, df)
+    assert_same_run(run, close, buy, sell, strategy.stop_loss, strategy.take_profit)
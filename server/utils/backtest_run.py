@@ -0,0 +1,60 @@
+"""
+Array form of a backtest run, produced by the rule and ML executors and serialized only at the API edge.
+
+Trades are parallel arrays: entry/exit bar positions (exit -1 for a trade still open at the end), side
+(1 long, -1 short), exit reason and pnl in percent. `equity` holds the cumulative realized plus
+unrealized pnl in percent for every bar of `index`.
+"""
+
+from collections import namedtuple
+import numpy as np
+
+EXIT_OPEN, EXIT_SIGNAL, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT = 0, 1, 2, 3
+EXIT_RESULTS = {EXIT_SIGNAL: "closed", EXIT_STOP_LOSS: "stop_loss", EXIT_TAKE_PROFIT: "take_profit"}
+
+BacktestRun = namedtuple("BacktestRun", ["index", "close", "entry", "exit", "side", "reason", "pnl", "equity"])
+
+
+def first_true(mask_at, start: int, n: int) -> int:
+    """First index >= start where mask_at(lo, hi) is True, scanning in growing chunks; n if none."""
+    chunk = 64
+    lo = start
+    while lo < n:
+        hi = min(n, lo + chunk)
+        hits = mask_at(lo, hi)
+        if hits.any():
+            return lo + int(hits.argmax())
+        lo = hi
+        chunk *= 2
+    return n
+
+
+def make_run(index, close: np.ndarray, entries: list, exits: list, sides: list, reasons: list, pnls: list) -> BacktestRun:
+    """Build the run from per-trade lists; bars from entry up to (not including) exit count as open."""
+    n = len(close)
+    realized = np.zeros(n)
+    side_by_bar = np.zeros(n, dtype=np.int8)
+    entry_by_bar = np.full(n, np.nan)
+
+    for entry, exit_bar, side, pnl in zip(entries, exits, sides, pnls):
+        end = n if exit_bar < 0 else exit_bar
+        side_by_bar[entry:end] = side
+        entry_by_bar[entry:end] = close[entry]
+        if exit_bar >= 0:
+            realized[exit_bar] = pnl
+
+    unrealized = np.zeros(n)
+    long_bars, short_bars = side_by_bar == 1, side_by_bar == -1
+    unrealized[long_bars] = ((close[long_bars] - entry_by_bar[long_bars]) / entry_by_bar[long_bars]) * 100
+    unrealized[short_bars] = ((entry_by_bar[short_bars] - close[short_bars]) / entry_by_bar[short_bars]) * 100
+
+    return BacktestRun(
+        index=index,
+        close=close,
+        entry=np.asarray(entries, dtype=np.int64),
+        exit=np.asarray(exits, dtype=np.int64),
+        side=np.asarray(sides, dtype=np.int8),
+        reason=np.asarray(reasons, dtype=np.int8),
+        pnl=np.asarray(pnls, dtype="f8"),
+        equity=np.cumsum(realized) + unrealized,
+    )
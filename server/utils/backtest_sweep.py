@@ -0,0 +1,148 @@
+"""
+Grid search over the tunable parameters of a rule strategy.
+
+Bars and indicator arrays are computed once per sweep; only thresholds, stop loss / take profit,
+signal logic and confirmation candles vary, so every combination reuses the same arrays. Signals are
+confirmed over confirmation_candles bars only with live_confirmation, like /backtest/run. Combinations
+run on a process pool whose workers receive the arrays once through the pool initializer.
+This module stays free of database and TensorFlow imports so spawned workers start quickly.
+"""
+
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from utils.backtest_run import EXIT_OPEN
+from utils.calculate_metrics import calculate_run_metrics
+from utils.indicators import add_indicators
+from utils.simulate_rule_strategy import backtest_indicator_columns, confirm_signals, rule_backtest_kernel
+from utils.strategy_evaluator import compile_strategy, evaluate_plan
+
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", min(4, os.cpu_count() or 1)))
+SWEEP_MAX_COMBINATIONS = int(os.getenv("SWEEP_MAX_COMBINATIONS", 1000))
+# Sweeps below this many bar evaluations (combinations x bars) run in-process:
+# starting spawned workers takes a few seconds, longer than such a sweep itself
+SWEEP_INLINE_BARS = 2_000_000
+
+STRATEGY_PARAMETERS = ("stop_loss", "take_profit", "confirmation_candles", "signal_logic")
+SIGNAL_PARAMETER = re.compile(r"^(buy_signals|sell_signals)\.(\d+)\.value$")
+RANK_ASCENDING = {"max_drawdown"}
+
+_worker_data = {}
+
+
+def strategy_config(strategy) -> dict:
+    """The fields a rule backtest depends on, as a plain (picklable) dict."""
+    return {
+        "buy_signals": list(strategy.buy_signals or []),
+        "sell_signals": list(strategy.sell_signals or []),
+        "signal_logic": strategy.signal_logic,
+        "stop_loss": strategy.stop_loss,
+        "take_profit": strategy.take_profit,
+        "confirmation_candles": strategy.confirmation_candles,
+    }
+
+
+def expand_grid(config: dict, parameters: dict, max_combinations: int = SWEEP_MAX_COMBINATIONS, live_confirmation: bool = False) -> list[dict]:
+    """
+    Cartesian product of `parameters` ({name: [values]}). Names are strategy fields from
+    STRATEGY_PARAMETERS or signal thresholds such as "buy_signals.0.value".
+    """
+    if not parameters:
+        raise ValueError("No parameters to sweep")
+
+    for name, values in parameters.items():
+        match = SIGNAL_PARAMETER.match(name)
+        if match:
+            side, position = match.group(1), int(match.group(2))
+            if position >= len(config[side]):
+                raise ValueError(f"{name}: strategy has only {len(config[side])} {side}")
+        elif name not in STRATEGY_PARAMETERS:
+            raise ValueError(f"Unsupported sweep parameter: {name}")
+        elif name == "confirmation_candles" and not live_confirmation:
+            raise ValueError("confirmation_candles only has an effect with live_confirmation")
+        if not values:
+            raise ValueError(f"{name}: no values given")
+
+    total = int(np.prod([len(values) for values in parameters.values()]))
+    if total > max_combinations:
+        raise ValueError(f"Sweep has {total} combinations, the limit is {max_combinations}")
+
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+
+def apply_parameters(config: dict, combination: dict) -> SimpleNamespace:
+    strategy = {**config, "buy_signals": [dict(s) for s in config["buy_signals"]], "sell_signals": [dict(s) for s in config["sell_signals"]]}
+    for name, value in combination.items():
+        match = SIGNAL_PARAMETER.match(name)
+        if match:
+            strategy[match.group(1)][int(match.group(2))]["value"] = value
+        elif name == "confirmation_candles":
+            strategy[name] = int(value or 1)
+        else:
+            strategy[name] = value
+    return SimpleNamespace(id=None, updated_at=None, **strategy)
+
+
+def _init_worker(config: dict, arrays: dict):
+    _worker_data["config"] = config
+    _worker_data["arrays"] = arrays
+
+
+def _run_in_worker(combination: dict) -> dict:
+    return run_combination(_worker_data["config"], _worker_data["arrays"], combination)
+
+
+def run_combination(config: dict, arrays: dict, combination: dict) -> dict:
+    strategy = apply_parameters(config, combination)
+    plan = compile_strategy(strategy)
+
+    close = arrays["Close"]
+    candles = strategy.confirmation_candles if config["live_confirmation"] else 1
+    buy = confirm_signals(evaluate_plan(plan.buy, arrays, len(close)), candles)
+    sell = confirm_signals(evaluate_plan(plan.sell, arrays, len(close)), candles)
+    run = rule_backtest_kernel(None, close, buy, sell, stop_loss=strategy.stop_loss, take_profit=strategy.take_profit)
+
+    return {
+        "parameters": combination,
+        "metrics": calculate_run_metrics(run.equity, run.pnl[run.reason != EXIT_OPEN]),
+    }
+
+
+def run_sweep(strategy, df: pd.DataFrame, parameters: dict, rank_by: str = "total_pnl", limit: int = None,
+              workers: int = SWEEP_WORKERS, live_confirmation: bool = False) -> dict:
+    """Backtest every combination of `parameters` on `df` and return them ranked by `rank_by`."""
+    config = {**strategy_config(strategy), "live_confirmation": live_confirmation}
+    combinations = expand_grid(config, parameters, live_confirmation=live_confirmation)
+
+    df = df.rename(columns={"close": "Close", "volume": "Volume"})
+    df = add_indicators(df.copy(), backtest_indicator_columns(config["buy_signals"] + config["sell_signals"]))
+    arrays = {column: df[column].to_numpy(dtype="f8") for column in df.columns if pd.api.types.is_numeric_dtype(df[column])}
+
+    if workers <= 1 or len(combinations) * len(df) <= SWEEP_INLINE_BARS:
+        results = [run_combination(config, arrays, combination) for combination in combinations]
+    else:
+        # spawn: forking a server process that has TensorFlow loaded is not safe
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config, arrays),
+        ) as pool:
+            chunksize = max(1, len(combinations) // (workers * 4))
+            results = list(pool.map(_run_in_worker, combinations, chunksize=chunksize))
+
+    results.sort(key=lambda r: r["metrics"][rank_by], reverse=rank_by not in RANK_ASCENDING)
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+
+    return {
+        "combinations": len(combinations),
+        "live_confirmation": live_confirmation,
+        "results": results[:limit] if limit else results,
+    }
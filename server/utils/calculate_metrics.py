@@ -52,4 +52,30 @@ def calculate_metrics(trades_log, equity_curve):
         "sharpe_ratio": round(sharpe_ratio, 2),
         "max_drawdown": round(max_drawdown, 2),
         "average_pnl": round(avg_pnl, 2)
-    }
\ No newline at end of file
+    }
+
+def calculate_run_metrics(equity: np.ndarray, trade_pnls: np.ndarray) -> dict:
+    """calculate_metrics on the arrays of a BacktestRun (closed-trade pnls and per-bar equity), without serializing it."""
+    trade_pnls = np.round(trade_pnls, 4)
+    equity = np.round(equity, 4)
+    pnl = float(trade_pnls.sum())
+    win_rate = (trade_pnls > 0).mean() * 100 if len(trade_pnls) else 0
+    sharpe_ratio = (
+        (np.mean(trade_pnls) / np.std(trade_pnls)) * np.sqrt(252)
+        if len(trade_pnls) > 1 and np.std(trade_pnls) > 0 else 0
+    )
+
+    peak = np.maximum.accumulate(np.maximum(equity, 0)) if len(equity) else equity
+    max_drawdown = float((peak - equity).max()) if len(equity) else 0
+    max_drawdown = max(max_drawdown, 0)
+
+    avg_pnl = np.mean(trade_pnls) if len(trade_pnls) else 0
+
+    return {
+        "total_pnl": round(pnl, 2),
+        "trades": len(trade_pnls),
+        "win_rate": round(float(win_rate), 2),
+        "sharpe_ratio": round(float(sharpe_ratio), 2),
+        "max_drawdown": round(max_drawdown, 2),
+        "average_pnl": round(float(avg_pnl), 2)
+    }
@@ -0,0 +1,267 @@
+"""
+Indicator engine shared by the live rule path, rule backtests, market-data endpoints and ML features.
+
+Indicators are registered declaratively (name, default params, dependencies). Results are memoized per
+(series fingerprint, indicator, params), so strategies evaluating the same bars in one scheduler pass,
+or an indicator needed by another one (MACD -> EMA), are computed once.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Memory budget of the memoized results: long minute-bar backtests produce large Series, so the
+# cache is bounded by bytes rather than entries
+INDICATOR_CACHE_BYTES = int(os.getenv("INDICATOR_CACHE_MB", 64)) * 1024 * 1024
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class Indicator:
+    def __init__(self, name: str, func, defaults: dict, deps: tuple):
+        self.name = name
+        self.func = func
+        self.defaults = defaults
+        self.deps = deps
+
+
+INDICATORS: dict[str, Indicator] = {}
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def register_indicator(name: str, deps: tuple = (), **defaults):
+    """Register `func(df, calc, **params)`; `calc(name, **params)` returns a (memoized) dependency."""
+    def decorator(func):
+        INDICATORS[name] = Indicator(name, func, defaults, tuple(deps))
+        return func
+    return decorator
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(len(df)).encode())
+    if isinstance(df.index, pd.DatetimeIndex):
+        h.update(np.ascontiguousarray(df.index.asi8).tobytes())
+    else:
+        h.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+    for col in OHLCV_COLUMNS:
+        if col in df.columns:
+            h.update(col.encode())
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype="f8")).tobytes())
+    return h.hexdigest()
+
+
+def compute_indicator(df: pd.DataFrame, name: str, fingerprint: str = None, **params) -> pd.Series:
+    """Compute one registered indicator on the OHLCV columns of `df`. The returned Series must not be modified."""
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}")
+    indicator = INDICATORS[name]
+
+    fingerprint = fingerprint or frame_fingerprint(df)
+    params = {**indicator.defaults, **params}
+    key = (fingerprint, name, tuple(sorted(params.items())))
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key][0]
+
+    def calc(dep_name, **dep_params):
+        return compute_indicator(df, dep_name, fingerprint, **dep_params)
+
+    result = indicator.func(df, calc, **params)
+    _remember(key, result)
+    return result
+
+
+def _remember(key: tuple, result: pd.Series):
+    global _cache_bytes
+    # The index is shared with the source frame, but the cache keeps it alive too
+    size = result.nbytes + result.index.nbytes
+    if size > INDICATOR_CACHE_BYTES:
+        return
+
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = (result, size)
+        _cache_bytes += size
+        while _cache_bytes > INDICATOR_CACHE_BYTES:
+            _, (_, evicted) = _cache.popitem(last=False)
+            _cache_bytes -= evicted
+
+
+def clear_indicator_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def add_indicators(df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """
+    Add `{column: (indicator, params)}` to `df` in place and return it.
+    Columns get their own copy of the data, so callers may modify them freely.
+    """
+    fingerprint = frame_fingerprint(df)
+    for column, (name, params) in columns.items():
+        df[column] = compute_indicator(df, name, fingerprint, **params).to_numpy(copy=True)
+    return df
+
+
+# Column specs of each consumer. Parameters differ on purpose where a path depends on them
+# (e.g. the ML features must match what the saved models were trained on).
+
+RULE_INDICATOR_COLUMNS = {
+    "SMA": {
+        "SMA_Short": ("sma", {"window": 10, "min_periods": 1}),
+        "SMA_Long": ("sma", {"window": 50, "min_periods": 1}),
+    },
+    "RSI": {
+        "RSI": ("rsi", {"period": 14, "min_periods": 1, "eps": 1e-10}),
+    },
+    "MACD": {
+        "MACD": ("macd", {}),
+        "MACD_SIGNAL": ("macd_signal", {}),
+    },
+    "Bollinger Bands": {
+        "BB_UPPER": ("bb_upper", {}),
+        "BB_LOWER": ("bb_lower", {}),
+    },
+}
+
+MARKET_DATA_COLUMNS = {
+    "SMA_10": ("sma", {"window": 10, "min_periods": 1}),
+    "SMA_50": ("sma", {"window": 50, "min_periods": 1}),
+    "EMA_10": ("ema", {"span": 10}),
+    "EMA_50": ("ema", {"span": 50}),
+    "RSI_14": ("rsi", {"period": 14, "min_periods": 1, "eps": 1e-10}),
+    "MACD": ("macd", {}),
+    "MACD_Signal": ("macd_signal", {}),
+    "Volatility": ("hl_range", {}),
+    "Daily_Return": ("candle_return", {}),
+}
+
+ML_FEATURE_COLUMNS = {
+    "EMA_10": ("ema", {"span": 10}),
+    "EMA_50": ("ema", {"span": 50}),
+    "RSI_14": ("rsi", {"period": 14}),
+    "Daily_Return": ("pct_change", {}),
+    "Volatility": ("return_volatility", {"window": 14}),
+    "HL_Range": ("hl_range", {}),
+    "Candle_Body": ("candle_body", {}),
+    "Volume_Rolling_5": ("sma", {"column": "Volume", "window": 5}),
+    "Volume_Rolling_20": ("sma", {"column": "Volume", "window": 20}),
+    "MACD": ("macd", {}),
+    "MACD_Signal": ("macd_signal", {}),
+    "BB_Band_Pct": ("bb_pct", {"ddof": 0}),
+    "ATR": ("atr", {"window": 14}),
+}
+
+
+def rule_indicator_columns(signals: list[dict]) -> dict:
+    """Only the columns the given buy/sell signals refer to."""
+    columns = {}
+    for signal in signals:
+        columns.update(RULE_INDICATOR_COLUMNS.get(signal.get("indicator"), {}))
+    return columns
+
+
+@register_indicator("sma", column="Close", window=10, min_periods=None)
+def _sma(df, calc, column, window, min_periods):
+    return df[column].rolling(window=window, min_periods=min_periods).mean()
+
+
+@register_indicator("ema", column="Close", span=10, adjust=False)
+def _ema(df, calc, column, span, adjust):
+    return df[column].ewm(span=span, adjust=adjust).mean()
+
+
+@register_indicator("rolling_std", column="Close", window=20, ddof=1)
+def _rolling_std(df, calc, column, window, ddof):
+    return df[column].rolling(window=window).std(ddof=ddof)
+
+
+@register_indicator("rsi", period=14, min_periods=None, eps=0.0)
+def _rsi(df, calc, period, min_periods, eps):
+    """SMA-smoothed RSI; eps > 0 keeps it defined when there were no losses in the window."""
+    delta = df["Close"].diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period, min_periods=min_periods).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period, min_periods=min_periods).mean()
+    rs = gain / (loss + eps)
+    return 100 - (100 / (1 + rs))
+
+
+@register_indicator("macd", deps=("ema",), fast=12, slow=26)
+def _macd(df, calc, fast, slow):
+    return calc("ema", span=fast) - calc("ema", span=slow)
+
+
+@register_indicator("macd_signal", deps=("macd",), fast=12, slow=26, signal=9)
+def _macd_signal(df, calc, fast, slow, signal):
+    return calc("macd", fast=fast, slow=slow).ewm(span=signal, adjust=False).mean()
+
+
+@register_indicator("bb_upper", deps=("sma", "rolling_std"), window=20, num_std=2, ddof=1)
+def _bb_upper(df, calc, window, num_std, ddof):
+    return calc("sma", window=window) + calc("rolling_std", window=window, ddof=ddof) * num_std
+
+
+@register_indicator("bb_lower", deps=("sma", "rolling_std"), window=20, num_std=2, ddof=1)
+def _bb_lower(df, calc, window, num_std, ddof):
+    return calc("sma", window=window) - calc("rolling_std", window=window, ddof=ddof) * num_std
+
+
+@register_indicator("bb_pct", deps=("bb_upper", "bb_lower"), window=20, num_std=2, ddof=1)
+def _bb_pct(df, calc, window, num_std, ddof):
+    upper = calc("bb_upper", window=window, num_std=num_std, ddof=ddof)
+    lower = calc("bb_lower", window=window, num_std=num_std, ddof=ddof)
+    return (df["Close"] - lower) / (upper - lower)
+
+
+@register_indicator("pct_change", column="Close")
+def _pct_change(df, calc, column):
+    return df[column].pct_change()
+
+
+@register_indicator("return_volatility", deps=("pct_change",), window=14)
+def _return_volatility(df, calc, window):
+    return calc("pct_change").rolling(window=window).std()
+
+
+@register_indicator("hl_range")
+def _hl_range(df, calc):
+    return df["High"] - df["Low"]
+
+
+@register_indicator("candle_body")
+def _candle_body(df, calc):
+    return df["Close"] - df["Open"]
+
+
+@register_indicator("candle_return")
+def _candle_return(df, calc):
+    return (df["Close"] - df["Open"]) / df["Open"]
+
+
+@register_indicator("atr", window=14)
+def _atr(df, calc, window):
+    """Average True Range with the same seeding and smoothing as ta.volatility.AverageTrueRange."""
+    prev_close = df["Close"].shift(1)
+    true_range = pd.DataFrame({
+        "tr1": df["High"] - df["Low"],
+        "tr2": (df["High"] - prev_close).abs(),
+        "tr3": (df["Low"] - prev_close).abs(),
+    }).max(axis=1).to_numpy()
+
+    atr = np.zeros(len(true_range))
+    if len(true_range) >= window:
+        atr[window - 1] = true_range[0:window].mean()
+        for i in range(window, len(atr)):
+            atr[i] = (atr[i - 1] * (window - 1) + true_range[i]) / float(window)
+    return pd.Series(atr, index=df.index)
@@ -0,0 +1,282 @@
+"""
+Streaming counterparts of the indicators in utils.indicators, for the live rule path.
+
+State is kept per (symbol, timeframe) and advanced by one bar at a time, so a live check only
+processes the bars that arrived since the previous check instead of recomputing a week of
+history. The latest bar may still be forming: it is evaluated on a copy of the state and only
+committed once a newer bar shows up.
+"""
+
+import copy
+import math
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+ONLINE_HISTORY_ROWS = 50
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class RollingWindow:
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def push(self, value: float):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    def mean(self) -> float:
+        return self.total / len(self.values)
+
+    def std(self, ddof: int) -> float:
+        mean = self.mean()
+        return math.sqrt(sum((v - mean) ** 2 for v in self.values) / (len(self.values) - ddof))
+
+
+class OnlineSMA:
+    def __init__(self, column="Close", window=10, min_periods=None):
+        self.column = column
+        self.min_periods = min_periods or window
+        self.values = RollingWindow(window)
+
+    def update(self, bar: dict) -> float:
+        self.values.push(bar[self.column])
+        return self.values.mean() if len(self.values.values) >= self.min_periods else np.nan
+
+
+class OnlineEMA:
+    def __init__(self, column="Close", span=10, adjust=False):
+        if adjust:
+            raise ValueError("Online EMA supports adjust=False only")
+        self.column = column
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def push(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def update(self, bar: dict) -> float:
+        return self.push(bar[self.column])
+
+
+class OnlineRSI:
+    """SMA-smoothed RSI like utils.indicators (smoothing="sma"), or Wilder's smoothing (smoothing="wilder")."""
+
+    def __init__(self, period=14, min_periods=None, eps=0.0, smoothing="sma"):
+        if smoothing not in ("sma", "wilder"):
+            raise ValueError(f"Unsupported RSI smoothing: {smoothing}")
+        self.period = period
+        self.min_periods = min_periods or period
+        self.eps = eps
+        self.smoothing = smoothing
+        self.prev_close = None
+        self.count = 0
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, bar: dict) -> float:
+        close = bar["Close"]
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.count += 1
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+
+        if self.smoothing == "sma" or self.count <= self.period:
+            self.gains.push(gain)
+            self.losses.push(loss)
+            self.avg_gain, self.avg_loss = self.gains.mean(), self.losses.mean()
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.count < self.min_periods:
+            return np.nan
+        denominator = self.avg_loss + self.eps
+        if denominator == 0:
+            return np.nan if self.avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + self.avg_gain / denominator))
+
+
+class OnlineMACD:
+    def __init__(self, fast=12, slow=26):
+        self.fast = OnlineEMA(span=fast)
+        self.slow = OnlineEMA(span=slow)
+
+    def update(self, bar: dict) -> float:
+        return self.fast.update(bar) - self.slow.update(bar)
+
+
+class OnlineMACDSignal:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.macd = OnlineMACD(fast, slow)
+        self.signal = OnlineEMA(span=signal)
+
+    def update(self, bar: dict) -> float:
+        return self.signal.push(self.macd.update(bar))
+
+
+class OnlineBollinger:
+    def __init__(self, side: int, window=20, num_std=2, ddof=1):
+        self.side = side
+        self.num_std = num_std
+        self.ddof = ddof
+        self.values = RollingWindow(window)
+
+    def update(self, bar: dict) -> float:
+        self.values.push(bar["Close"])
+        if len(self.values.values) < self.values.window:
+            return np.nan
+        return self.values.mean() + self.side * self.num_std * self.values.std(self.ddof)
+
+
+class OnlineATR:
+    """Same seeding as the batch atr: zero until `window` true ranges are seen, then Wilder smoothing."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.true_ranges = []
+        self.value = 0.0
+
+    def update(self, bar: dict) -> float:
+        true_range = bar["High"] - bar["Low"]
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(bar["High"] - self.prev_close), abs(bar["Low"] - self.prev_close))
+        self.prev_close = bar["Close"]
+
+        if self.true_ranges is not None:
+            self.true_ranges.append(true_range)
+            if len(self.true_ranges) == self.window:
+                self.value = sum(self.true_ranges) / self.window
+                self.true_ranges = None
+            return self.value
+
+        self.value = (self.value * (self.window - 1) + true_range) / float(self.window)
+        return self.value
+
+
+ONLINE_INDICATORS = {
+    "sma": OnlineSMA,
+    "ema": OnlineEMA,
+    "rsi": OnlineRSI,
+    "macd": OnlineMACD,
+    "macd_signal": OnlineMACDSignal,
+    "bb_upper": lambda **params: OnlineBollinger(side=1, **params),
+    "bb_lower": lambda **params: OnlineBollinger(side=-1, **params),
+    "atr": OnlineATR,
+}
+
+
+def make_online_indicator(name: str, params: dict):
+    if name not in ONLINE_INDICATORS:
+        raise ValueError(f"Indicator {name} has no online implementation")
+    return ONLINE_INDICATORS[name](**params)
+
+
+class OnlineIndicatorState:
+    """
+    Indicator state of one bar series, committed up to `last_ts` (nanoseconds since epoch).
+    The last `history_rows` committed rows are kept for callers that look back over several bars.
+    """
+
+    def __init__(self, columns: dict, history_rows: int = ONLINE_HISTORY_ROWS):
+        self.columns = dict(columns)
+        self.indicators = {column: make_online_indicator(name, params) for column, (name, params) in columns.items()}
+        self.history = deque(maxlen=max(history_rows, ONLINE_HISTORY_ROWS))
+        self.last_ts = None
+
+    def covers(self, columns: dict, rows: int = 1) -> bool:
+        # rows - 1 committed rows precede the provisional latest bar
+        if rows - 1 > self.history.maxlen:
+            return False
+        return all(self.columns.get(column) == spec for column, spec in columns.items())
+
+    @staticmethod
+    def _step(indicators: dict, ts: int, bar: dict) -> tuple:
+        return ts, bar, {column: indicator.update(bar) for column, indicator in indicators.items()}
+
+    def commit(self, ts: int, bar: dict):
+        self.history.append(self._step(self.indicators, ts, bar))
+        self.last_ts = ts
+
+    def preview(self, ts: int, bar: dict) -> tuple:
+        return self._step(copy.deepcopy(self.indicators), ts, bar)
+
+
+class OnlineIndicatorStore:
+    """
+    Process-wide online indicator state, keyed by (symbol, timeframe).
+
+    A state is (re)built from the full frame when it is missing, lacks a requested column, keeps
+    fewer rows than requested, or no longer lines up with the bars it is given (gap after downtime,
+    revised history); otherwise only the new bars are applied.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame, columns: dict, rows: int = 1) -> pd.DataFrame:
+        """
+        Advance the state with the bars of `df` and return its last `rows` rows (OHLCV plus indicator
+        columns), the last one being the provisional latest bar.
+        """
+        if df is None or df.empty:
+            return pd.DataFrame()
+        df = df if df.index.is_monotonic_increasing else df.sort_index()
+
+        key = (symbol, timeframe)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            state = self._states.get(key)
+            timestamps = df.index.asi8
+            start = self._resume_position(state, timestamps, columns, rows)
+            if start is None:
+                history_rows = max(rows - 1, state.history.maxlen if state else 0)
+                state = OnlineIndicatorState({**(state.columns if state else {}), **columns}, history_rows)
+                self._states[key] = state
+                start = 0
+
+            bars = {col: df[col].to_numpy(dtype="f8") for col in OHLCV_COLUMNS if col in df.columns}
+            for i in range(start, len(df) - 1):
+                state.commit(int(timestamps[i]), {col: values[i] for col, values in bars.items()})
+            latest = state.preview(int(timestamps[-1]), {col: values[-1] for col, values in bars.items()})
+
+            entries = list(state.history)[-(rows - 1):] if rows > 1 else []
+            entries.append(latest)
+
+        return self._to_frame(entries, list(columns), df.index)
+
+    @staticmethod
+    def _resume_position(state, timestamps, columns: dict, rows: int):
+        if state is None or state.last_ts is None or not state.covers(columns, rows):
+            return None
+        pos = int(np.searchsorted(timestamps, state.last_ts, side="right"))
+        if pos == 0 or timestamps[pos - 1] != state.last_ts or pos >= len(timestamps):
+            return None
+        return pos
+
+    @staticmethod
+    def _to_frame(entries: list, columns: list, source_index: pd.DatetimeIndex) -> pd.DataFrame:
+        index = pd.DatetimeIndex([ts for ts, _, _ in entries], tz=source_index.tz, name=source_index.name)
+        data = {col: [bar[col] for _, bar, _ in entries] for col in entries[-1][1]}
+        data.update({col: [values[col] for _, _, values in entries] for col in columns})
+        return pd.DataFrame(data, index=index)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+online_indicators = OnlineIndicatorStore()
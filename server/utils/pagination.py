@@ -0,0 +1,51 @@
+"""
+Keyset (cursor) pagination for logs ordered newest first.
+
+A cursor is the (timestamp, id) of the last row of a page, base64 encoded. The next page continues
+strictly after it in (timestamp desc, id desc) order, so pages stay stable while new rows are added
+and each page is an index range scan instead of an OFFSET that reads and discards every earlier row.
+"""
+
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(query, time_column, id_column, cursor: str | None, limit: int | None) -> tuple[list, str | None]:
+    """
+    One page of `query` newest first, starting after `cursor`; returns (rows, next_cursor).
+    Without a limit all remaining rows are returned and next_cursor is None.
+    """
+    # Rows without a timestamp have no position in the order; the log columns are NOT NULL
+    query = query.filter(time_column.isnot(None))
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(or_(time_column < timestamp, and_(time_column == timestamp, id_column < row_id)))
+
+    query = query.order_by(time_column.desc(), id_column.desc())
+    if limit is None:
+        return query.all(), None
+
+    limit = min(limit, MAX_PAGE_SIZE)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, time_column.key), getattr(last, id_column.key))
@@ -1,16 +1,17 @@
 import pandas as pd
 from ai_model.predictors.predict_signals_batch import predict_signals_batch
 from ai_model.strategies.execute_ml_tf import execute_conservative_strategy
+from utils.backtest_run import BacktestRun
 
 
-def simulate_ai_strategy(ticker: str, user_id: int, df: pd.DataFrame) -> tuple[list[dict], list[dict], str | None, float | None]:
+def simulate_ai_strategy(ticker: str, user_id: int, df: pd.DataFrame, progress=None) -> BacktestRun:
     """
     Simulates a trading strategy using AI-generated signals.
     """
     df = df.copy()
 
     try:
-        signal_df = predict_signals_batch(ticker=ticker, user_id=user_id, df=df)
+        signal_df = predict_signals_batch(ticker=ticker, user_id=user_id, df=df, progress=progress)
         if signal_df.empty:
             raise ValueError("AI signals dataframe is empty")
     except Exception as e:
@@ -21,6 +22,4 @@ def simulate_ai_strategy(ticker: str, user_id: int, df: pd.DataFrame) -> tuple[l
     df["signal"] = df["signal"].fillna("hold")
     df["confidence"] = df["confidence"].fillna(0.0)
 
-    trades_log, equity_curve, position, entry_price = execute_conservative_strategy(df)
-
-    return trades_log, equity_curve, position, entry_price
\ No newline at end of file
+    return execute_conservative_strategy(df)
\ No newline at end of file
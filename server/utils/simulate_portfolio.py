@@ -0,0 +1,130 @@
+"""
+Portfolio backtest of one rule strategy across several tickers with a shared capital pool.
+
+Each ticker follows the same entry/exit rules as the single-ticker backtest (see
+utils.simulate_rule_strategy.find_rule_exit). Trades are processed as events in time order across
+all tickers, exits before entries at the same timestamp, so cash released by a close can fund an
+entry on the same bar. An entry that the remaining cash cannot fund is skipped.
+
+Position size follows the strategy: `use_balance_percent` spends trade_amount percent of the cash at
+entry, `use_notional` spends trade_amount dollars, otherwise trade_amount is a share count. Shorts
+reserve their notional the same way longs spend it.
+"""
+
+import heapq
+import numpy as np
+import pandas as pd
+from utils.backtest_run import EXIT_OPEN, EXIT_SIGNAL
+from utils.simulate_rule_strategy import find_rule_exit
+
+EXIT_EVENT, ENTRY_EVENT = 0, 1
+
+
+class TickerSeries:
+    def __init__(self, ticker: str, index: pd.DatetimeIndex, close: np.ndarray, buy: np.ndarray, sell: np.ndarray):
+        self.ticker = ticker
+        self.index = index
+        self.timestamps = index.asi8
+        self.close = close
+        self.buy = buy
+        self.sell = sell
+        self.signal_bars = np.flatnonzero(buy | sell)
+
+
+def position_notional(strategy, cash: float, price: float) -> float:
+    if strategy.use_balance_percent:
+        return cash * (strategy.trade_amount / 100)
+    if strategy.use_notional:
+        return strategy.trade_amount
+    return strategy.trade_amount * price
+
+
+def simulate_portfolio(strategy, series: list[TickerSeries], initial_capital: float) -> dict:
+    """
+    Returns the trades (one dict per trade, exit fields None while open), the number of skipped entries
+    per ticker, and the portfolio equity on the union of all bar timestamps.
+    """
+    events = []
+    cash = float(initial_capital)
+    open_trades = {}
+    trades = []
+    skipped = {s.ticker: 0 for s in series}
+
+    def schedule_entry(pos: int, start: int):
+        s = series[pos]
+        k = int(np.searchsorted(s.signal_bars, start))
+        if k < len(s.signal_bars):
+            bar = int(s.signal_bars[k])
+            heapq.heappush(events, (int(s.timestamps[bar]), ENTRY_EVENT, pos, bar))
+
+    for pos in range(len(series)):
+        schedule_entry(pos, 0)
+
+    while events:
+        _, kind, pos, bar = heapq.heappop(events)
+        s = series[pos]
+        price = float(s.close[bar])
+
+        if kind == ENTRY_EVENT:
+            notional = position_notional(strategy, cash, price)
+            if notional <= 0 or notional > cash or price <= 0:
+                skipped[s.ticker] += 1
+                schedule_entry(pos, bar + 1)
+                continue
+
+            side = 1 if s.buy[bar] else -1
+            cash -= notional
+            trade = {
+                "ticker": s.ticker, "side": side, "qty": notional / price, "notional": notional,
+                "entry": bar, "entry_price": price, "exit": None, "exit_price": None, "reason": EXIT_OPEN, "pnl": 0.0,
+            }
+            trades.append(trade)
+            open_trades[pos] = trade
+
+            exit_bar, reason = find_rule_exit(s.close, s.buy, s.sell, bar, side, strategy.stop_loss, strategy.take_profit)
+            if reason != EXIT_OPEN:
+                trade["reason"] = reason
+                heapq.heappush(events, (int(s.timestamps[exit_bar]), EXIT_EVENT, pos, exit_bar))
+            continue
+
+        trade = open_trades.pop(pos)
+        trade["exit"], trade["exit_price"] = bar, price
+        trade["pnl"] = trade["side"] * trade["qty"] * (price - trade["entry_price"])
+        cash += trade["notional"] + trade["pnl"]
+        # After a stop loss / take profit the same bar may open a new trade
+        schedule_entry(pos, bar + 1 if trade["reason"] == EXIT_SIGNAL else bar)
+
+    return {
+        "trades": trades,
+        "skipped": skipped,
+        **portfolio_equity(series, trades, initial_capital),
+    }
+
+
+def portfolio_equity(series: list[TickerSeries], trades: list[dict], initial_capital: float) -> dict:
+    """Initial capital plus realized pnl plus mark-to-market of open trades, on the union timeline."""
+    timeline = pd.DatetimeIndex(np.unique(np.concatenate([s.index.asi8 for s in series]))).tz_localize("UTC") \
+        if series else pd.DatetimeIndex([], tz="UTC")
+    stamps = timeline.asi8
+    realized = np.zeros(len(stamps))
+    unrealized = np.zeros(len(stamps))
+
+    by_ticker = {s.ticker: s for s in series}
+    closes = {}
+    for trade in trades:
+        s = by_ticker[trade["ticker"]]
+        if s.ticker not in closes:
+            # Last known close of the ticker at every timeline stamp
+            at = np.searchsorted(s.timestamps, stamps, side="right") - 1
+            closes[s.ticker] = np.where(at >= 0, s.close[np.maximum(at, 0)], np.nan)
+
+        start = np.searchsorted(stamps, s.timestamps[trade["entry"]])
+        end = len(stamps) if trade["exit"] is None else np.searchsorted(stamps, s.timestamps[trade["exit"]])
+        unrealized[start:end] += trade["side"] * trade["qty"] * (closes[s.ticker][start:end] - trade["entry_price"])
+        if trade["exit"] is not None:
+            realized[end] += trade["pnl"]
+
+    return {
+        "timeline": timeline,
+        "equity": initial_capital + np.cumsum(realized) + unrealized,
+    }
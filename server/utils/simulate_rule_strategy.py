@@ -1,130 +1,134 @@
+import numpy as np
 import pandas as pd
-from utils.strategy_evaluator import eval_expr
-
-
-def build_expr(signals):
-    expressions = []
-    for s in signals:
-        raw_indicator = s.get("indicator")
-        operator = s.get("operator", ">")
-        value = s.get("value")
-
-        if not raw_indicator or value is None:
-            continue
-
-        indicator = "BB_lower" if raw_indicator == "Bollinger Bands" else raw_indicator
-        expressions.append(f"{indicator} {operator} {value}")
-    return " and ".join(expressions)
-
-
-def simulate_rule_strategy(strategy, df: pd.DataFrame) -> tuple[list[dict], list[dict], str | None, float | None]:
+from utils.strategy_evaluator import evaluate_strategy
+from utils.indicators import add_indicators, rule_indicator_columns
+from utils.backtest_run import BacktestRun, EXIT_OPEN, EXIT_SIGNAL, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, first_true, make_run
+
+# Raw indicator columns that older strategies may reference by name, on top of the strategy-form ones
+BACKTEST_INDICATOR_COLUMNS = {
+    "EMA_10": {"EMA_10": ("ema", {"span": 10, "adjust": True})},
+    "SMA_10": {"SMA_10": ("sma", {"window": 10})},
+}
+
+
+def backtest_indicator_columns(signals: list[dict]) -> dict:
+    columns = rule_indicator_columns(signals)
+    for signal in signals:
+        columns.update(BACKTEST_INDICATOR_COLUMNS.get(signal.get("indicator"), {}))
+    return columns
+
+
+def confirm_signals(mask: np.ndarray, candles: int) -> np.ndarray:
+    """True where the signal held on each of the last `candles` bars, as the live check requires."""
+    if not candles or candles <= 1:
+        return mask
+    counts = np.cumsum(mask, dtype=np.int64)
+    counts[candles:] -= counts[:-candles].copy()
+    confirmed = counts == candles
+    confirmed[:candles - 1] = False
+    return confirmed
+
+
+def rule_signals(strategy, df: pd.DataFrame, confirm: bool = False) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (index, close, buy, sell) arrays of a rule strategy over `df`. With `confirm`, signals must hold for
+    confirmation_candles bars like in the live check; otherwise single bars are evaluated.
+    """
     df = df.copy()
     df = df.rename(columns={"close": "Close", "volume": "Volume"})
 
-    needed_cols = [s["indicator"] for s in strategy.buy_signals + strategy.sell_signals]
-    if "EMA_10" in needed_cols:
-        df["EMA_10"] = df["Close"].ewm(span=10).mean()
-    if "SMA_10" in needed_cols:
-        df["SMA_10"] = df["Close"].rolling(window=10).mean()
-    if "RSI" in needed_cols:
-        delta = df["Close"].diff()
-        up = delta.clip(lower=0).rolling(14).mean()
-        down = -delta.clip(upper=0).rolling(14).mean()
-        rs = up / down
-        df["RSI"] = 100 - (100 / (1 + rs))
-    if "MACD" in needed_cols:
-        exp1 = df["Close"].ewm(span=12, adjust=False).mean()
-        exp2 = df["Close"].ewm(span=26, adjust=False).mean()
-        df["MACD"] = exp1 - exp2
-    if "Bollinger Bands" in needed_cols or "BB_upper" in needed_cols or "BB_lower" in needed_cols:
-        sma = df["Close"].rolling(window=20).mean()
-        std = df["Close"].rolling(window=20).std()
-        df["BB_upper"] = sma + 2 * std
-        df["BB_lower"] = sma - 2 * std
-
-    buy_expr = build_expr(strategy.buy_signals)
-    sell_expr = build_expr(strategy.sell_signals)
-
-    df["Buy"] = eval_expr(buy_expr, df) if buy_expr else False
-    df["Sell"] = eval_expr(sell_expr, df) if sell_expr else False
-
-    position = None
-    entry_price = None
-    trades_log = []
-    equity_curve = []
-
-    cumulative_pnl = 0.0
-
-    for index, row in df.iterrows():
-        current_price = row["Close"]
-        realized_pnl = 0.0
-
-        if position in ("long", "short"):
-            sl_triggered = tp_triggered = False
-
-            if strategy.stop_loss:
-                sl_threshold = entry_price * (1 - strategy.stop_loss / 100) if position == "long" else entry_price * (1 + strategy.stop_loss / 100)
-                sl_triggered = current_price <= sl_threshold if position == "long" else current_price >= sl_threshold
-
-            if strategy.take_profit:
-                tp_threshold = entry_price * (1 + strategy.take_profit / 100) if position == "long" else entry_price * (1 - strategy.take_profit / 100)
-                tp_triggered = current_price >= tp_threshold if position == "long" else current_price <= tp_threshold
-
-            if sl_triggered or tp_triggered:
-                exit_price = current_price
-                trade_pnl = (
-                    ((exit_price - entry_price) / entry_price) * 100
-                    if position == "long"
-                    else ((entry_price - exit_price) / entry_price) * 100
-                )
-                realized_pnl = trade_pnl
-                trades_log.append({
-                    "action": "exit",
-                    "price": round(exit_price, 2),
-                    "result": "stop_loss" if sl_triggered else "take_profit",
-                    "pnl": round(trade_pnl, 4),
-                    "time": index
-                })
-                position = None
-                entry_price = None
-
-        if row["Buy"] and position is None:
-            position = "long"
-            entry_price = current_price
-            trades_log.append({"action": "buy", "price": round(entry_price, 2), "result": "opened", "pnl": 0, "time": index})
-
-        elif row["Sell"] and position is None:
-            position = "short"
-            entry_price = current_price
-            trades_log.append({"action": "sell", "price": round(entry_price, 2), "result": "opened", "pnl": 0, "time": index})
-
-        elif row["Sell"] and position == "long":
-            exit_price = current_price
-            trade_pnl = ((exit_price - entry_price) / entry_price) * 100
-            realized_pnl = trade_pnl
-            trades_log.append({"action": "sell", "price": round(exit_price, 2), "result": "closed", "pnl": round(trade_pnl, 4), "time": index})
-            position = None
-            entry_price = None
-
-        elif row["Buy"] and position == "short":
-            exit_price = current_price
-            trade_pnl = ((entry_price - exit_price) / entry_price) * 100
-            realized_pnl = trade_pnl
-            trades_log.append({"action": "buy", "price": round(exit_price, 2), "result": "closed", "pnl": round(trade_pnl, 4), "time": index})
-            position = None
-            entry_price = None
-
-        cumulative_pnl += realized_pnl
-
-        unrealized_pnl = 0.0
-        if position == "long":
-            unrealized_pnl = ((current_price - entry_price) / entry_price) * 100
-        elif position == "short":
-            unrealized_pnl = ((entry_price - current_price) / entry_price) * 100
-
-        equity_curve.append({
-            "date": index.isoformat(),
-            "pnl": round(cumulative_pnl + unrealized_pnl, 4)
-        })
-
-    return trades_log, equity_curve, position, entry_price
\ No newline at end of file
+    add_indicators(df, backtest_indicator_columns(strategy.buy_signals + strategy.sell_signals))
+
+    buy, sell = evaluate_strategy(strategy, df)
+    if confirm:
+        buy = confirm_signals(buy, strategy.confirmation_candles)
+        sell = confirm_signals(sell, strategy.confirmation_candles)
+    return df.index, df["Close"].to_numpy(dtype="f8"), buy, sell
+
+
+def simulate_rule_strategy(strategy, df: pd.DataFrame, confirm: bool = False) -> BacktestRun:
+    index, close, buy, sell = rule_signals(strategy, df, confirm)
+    return rule_backtest_kernel(index, close, buy, sell, stop_loss=strategy.stop_loss, take_profit=strategy.take_profit)
+
+
+def find_rule_exit(close: np.ndarray, buy: np.ndarray, sell: np.ndarray, entry: int, side: int, stop_loss=None, take_profit=None) -> tuple[int, int]:
+    """
+    (exit bar, exit reason) of a trade opened at `entry`: the first later bar whose close hits the stop loss
+    or take profit (checked first, stop loss before take profit) or that has the opposite signal.
+    Returns (len(close), EXIT_OPEN) when the trade is still open at the end.
+    """
+    n = len(close)
+    entry_price = close[entry]
+
+    # Same threshold arithmetic as the per-bar loop this replaced, so results match exactly
+    if side == 1:
+        sl = entry_price * (1 - stop_loss / 100) if stop_loss else None
+        tp = entry_price * (1 + take_profit / 100) if take_profit else None
+        exit_signal = sell
+    else:
+        sl = entry_price * (1 + stop_loss / 100) if stop_loss else None
+        tp = entry_price * (1 - take_profit / 100) if take_profit else None
+        exit_signal = buy
+
+    def sl_hits(lo, hi):
+        if sl is None:
+            return np.zeros(hi - lo, dtype=bool)
+        return close[lo:hi] <= sl if side == 1 else close[lo:hi] >= sl
+
+    def tp_hits(lo, hi):
+        if tp is None:
+            return np.zeros(hi - lo, dtype=bool)
+        return close[lo:hi] >= tp if side == 1 else close[lo:hi] <= tp
+
+    exit_bar = first_true(lambda lo, hi: sl_hits(lo, hi) | tp_hits(lo, hi) | exit_signal[lo:hi], entry + 1, n)
+    if exit_bar == n:
+        return n, EXIT_OPEN
+    if sl_hits(exit_bar, exit_bar + 1)[0]:
+        return exit_bar, EXIT_STOP_LOSS
+    if tp_hits(exit_bar, exit_bar + 1)[0]:
+        return exit_bar, EXIT_TAKE_PROFIT
+    return exit_bar, EXIT_SIGNAL
+
+
+def rule_backtest_kernel(index: pd.DatetimeIndex, close: np.ndarray, buy: np.ndarray, sell: np.ndarray, stop_loss=None, take_profit=None) -> BacktestRun:
+    """
+    Position state machine of a rule backtest over signal arrays.
+
+    Jumps from event to event instead of stepping through every bar: the next entry is looked up among
+    the signal bars, and the exit of an open trade is the first later bar that hits the stop loss, the
+    take profit or the opposite signal. Semantics:
+      - stop loss / take profit are checked from the bar after entry, before signals, at the close;
+      - after a stop loss / take profit exit a new trade may open on the same bar, after a signal exit it may not;
+      - a bar with both signals opens long.
+    """
+    n = len(close)
+    entry_bars = np.flatnonzero(buy | sell)
+
+    entries, exits, sides, reasons, pnls = [], [], [], [], []
+
+    i = 0
+    while i < n:
+        k = int(np.searchsorted(entry_bars, i))
+        if k == len(entry_bars):
+            break
+        entry = int(entry_bars[k])
+        side = 1 if buy[entry] else -1
+        exit_bar, reason = find_rule_exit(close, buy, sell, entry, side, stop_loss, take_profit)
+
+        entries.append(entry)
+        sides.append(side)
+        reasons.append(reason)
+
+        if reason == EXIT_OPEN:
+            exits.append(-1)
+            pnls.append(0.0)
+            break
+
+        entry_price, exit_price = close[entry], close[exit_bar]
+        pnl = ((exit_price - entry_price) / entry_price) * 100 if side == 1 else ((entry_price - exit_price) / entry_price) * 100
+        exits.append(exit_bar)
+        pnls.append(pnl)
+        # After a stop loss / take profit the same bar may open a new trade
+        i = exit_bar + 1 if reason == EXIT_SIGNAL else exit_bar
+
+    return make_run(index, close, entries, exits, sides, reasons, pnls)
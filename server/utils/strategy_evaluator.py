@@ -1,25 +1,120 @@
-import re
-import pandas as pd
+"""
+Rule strategies compiled into predicate plans.
+
+The JSON buy/sell signals of a strategy are compiled once per strategy version into a small tuple
+AST, which is evaluated with NumPy over indicator arrays. The same plan drives live checks and
+backtests; nothing is passed through eval().
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
 import numpy as np
+import pandas as pd
+
+PLAN_CACHE_SIZE = 256
+
+COMPARATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    ">=": np.greater_equal,
+    ">": np.greater,
+}
+
+# Left-hand side of each strategy-form indicator, and whether the signal value is the threshold
+# (SMA compares the short/long spread to 0). Other names compare the column of that name.
+SIGNAL_OPERANDS = {
+    "RSI": (("col", "RSI"), True),
+    "SMA": (("sub", ("col", "SMA_Short"), ("col", "SMA_Long")), False),
+    "MACD": (("sub", ("col", "MACD"), ("col", "MACD_SIGNAL")), True),
+    "Bollinger Bands": (("col", "Close"), True),
+}
+
+SignalPlan = namedtuple("SignalPlan", ["buy", "sell"])
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def compile_signals(signals: list[dict], logic: str = "AND") -> tuple:
+    """Compile signal dicts into ("all" | "any", conditions); signals without indicator or value are skipped."""
+    conditions = []
+    for signal in signals or []:
+        indicator = signal.get("indicator")
+        value = signal.get("value")
+        if not indicator or value is None:
+            continue
+
+        operator = signal.get("operator", ">")
+        if operator not in COMPARATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+
+        operand, uses_value = SIGNAL_OPERANDS.get(indicator, (("col", indicator), True))
+        conditions.append(("cmp", operator, operand, float(value) if uses_value else 0.0))
 
-def eval_expr(expr: str, df: pd.DataFrame) -> pd.Series:
+    return ("any" if (logic or "AND").upper() == "OR" else "all", tuple(conditions))
+
+
+def compile_strategy(strategy) -> SignalPlan:
+    return SignalPlan(
+        buy=compile_signals(strategy.buy_signals, strategy.signal_logic),
+        sell=compile_signals(strategy.sell_signals, strategy.signal_logic),
+    )
+
+
+def strategy_plan(strategy) -> SignalPlan:
+    """Cached plan of a strategy, keyed by (id, updated_at) so edits produce a new plan."""
+    key = (getattr(strategy, "id", None), getattr(strategy, "updated_at", None))
+    if None in key:
+        return compile_strategy(strategy)
+
+    with _plans_lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+
+    plan = compile_strategy(strategy)
+    with _plans_lock:
+        _plans[key] = plan
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _operand(node: tuple, data) -> np.ndarray | None:
+    if node[0] == "col":
+        if node[1] not in data:
+            return None
+        return np.asarray(data[node[1]], dtype="f8")
+    left, right = _operand(node[1], data), _operand(node[2], data)
+    if left is None or right is None:
+        return None
+    return left - right
+
+
+def evaluate_plan(plan: tuple, data, length: int = None) -> np.ndarray:
     """
-    Evaluates a boolean expression string against a pandas DataFrame.
-    Automatically converts 'and', 'or', 'not' into bitwise ops and adds parentheses to avoid precedence issues.
+    Boolean array of `plan` over `data` (a DataFrame or a dict of arrays).
+    Conditions on missing columns or NaN values are False; a plan without conditions never fires.
     """
+    if length is None:
+        length = len(data) if isinstance(data, pd.DataFrame) else len(next(iter(data.values())))
+    mode, conditions = plan
+    if not conditions:
+        return np.zeros(length, dtype=bool)
+
+    result = np.ones(length, dtype=bool) if mode == "all" else np.zeros(length, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for _, operator, operand, value in conditions:
+            values = _operand(operand, data)
+            hit = COMPARATORS[operator](values, value) if values is not None else np.zeros(length, dtype=bool)
+            if mode == "all":
+                result &= hit
+            else:
+                result |= hit
+    return result
+
 
-    expr = re.sub(r'([a-zA-Z0-9_]+ *[<>=!]=? *[^&|() ]+)', r'(\1)', expr)
-    expr = expr.replace(" and ", " & ").replace(" or ", " | ").replace(" not ", " ~ ")
-
-    allowed_names = {col: df[col] for col in df.columns}
-    allowed_names.update({"True": True, "False": False})
-
-    try:
-        result = eval(expr, {"__builtins__": {}}, allowed_names)
-        if isinstance(result, pd.Series):
-            return result.fillna(False)
-        return pd.Series([False] * len(df))
-    except Exception as e:
-        print(f"Error in eval_expr: {e}")
-        print(f"Error: {expr}")
-        return pd.Series([False] * len(df))
\ No newline at end of file
+def evaluate_strategy(strategy, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    plan = strategy_plan(strategy)
+    return evaluate_plan(plan.buy, data), evaluate_plan(plan.sell, data)